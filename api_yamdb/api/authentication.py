@@ -0,0 +1,168 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.revocation import revoked_tokens
+from reviews.models import TOKEN_CLAIM_FIELDS, User
+
+TOKEN_VERSION_KEY = 'auth:token_version:{}'
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def get_cache():
+    return caches[settings.TOKEN_VERSION_CACHE_ALIAS]
+
+
+def set_token_version(user_id, version):
+    get_cache().set(
+        TOKEN_VERSION_KEY.format(user_id), version,
+        settings.TOKEN_VERSION_CACHE_TIMEOUT
+    )
+
+
+def forget_token_version(user_id):
+    get_cache().delete(TOKEN_VERSION_KEY.format(user_id))
+
+
+def get_token_version(user_id):
+    version = get_cache().get(TOKEN_VERSION_KEY.format(user_id))
+    if version is None:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        if version is not None:
+            set_token_version(user_id, version)
+    return version
+
+
+class RoleAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field in TOKEN_CLAIM_FIELDS:
+            token[field] = getattr(user, field)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+def get_token_user(token):
+    # Пользователь с отложенными полями: права проверяются по данным
+    # токена, а остальные поля загрузятся из БД только при обращении.
+    claims = {
+        'id': token[api_settings.USER_ID_CLAIM],
+        'token_version': token[TOKEN_VERSION_CLAIM],
+        **{field: token[field] for field in TOKEN_CLAIM_FIELDS},
+    }
+    field_names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in claims
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, field_names,
+        [claims[field] for field in field_names]
+    )
+
+
+class VerifiedTokenCache:
+    # LRU проверенных токенов процесса: по SHA-256 токена хранятся его
+    # claims, пользователь и версия токенов до истечения срока действия.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1:]
+
+    def set(self, key, expires_at, token, user, version):
+        with self.lock:
+            self.entries[key] = (expires_at, token, user, version)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.VERIFIED_TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.entries),
+                'max_size': settings.VERIFIED_TOKEN_CACHE_SIZE,
+            }
+
+
+verified_tokens = VerifiedTokenCache()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    # Повторно предъявленный токен берётся из verified_tokens без проверки
+    # подписи; остаётся только сверка версии токенов пользователя.
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        key = hashlib.sha256(raw_token).digest()
+        cached = verified_tokens.get(key)
+        if cached is not None:
+            validated_token, user, version = cached
+            self.check_revoked(key, validated_token)
+            if version == get_token_version(user.pk):
+                return copy.copy(user), validated_token
+            verified_tokens.discard(key)
+        validated_token = self.get_validated_token(raw_token)
+        self.check_revoked(key, validated_token)
+        user = self.get_user(validated_token)
+        verified_tokens.set(
+            key, validated_token['exp'], validated_token, copy.copy(user),
+            validated_token.get(TOKEN_VERSION_CLAIM, user.token_version)
+        )
+        return user, validated_token
+
+    def check_revoked(self, key, validated_token):
+        if revoked_tokens.is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            verified_tokens.discard(key)
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+
+    # Токены без версии (выданные до появления claims) обрабатываются
+    # как раньше — с загрузкой пользователя из БД.
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        if validated_token[TOKEN_VERSION_CLAIM] != get_token_version(
+            validated_token[api_settings.USER_ID_CLAIM]
+        ):
+            raise AuthenticationFailed(
+                'Токен устарел. Получите новый токен.',
+                code='token_outdated'
+            )
+        return get_token_user(validated_token)
@@ -0,0 +1,214 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from heapq import nsmallest
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from reviews.models import Title
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return text.casefold().replace('ё', 'е')
+
+
+class TitleAutocompleteIndex:
+    # Отсортированный массив пар (хвост названия с начала слова, id):
+    # поиск по префиксу — это bisect и проход по соседним элементам.
+    # Результаты для популярных префиксов запоминаются до изменения индекса.
+    # Индекс строится и обновляется в фоновых потоках: запрос к БД никогда
+    # не выполняется в обработчике запроса, до первой сборки поиск ничего
+    # не находит.
+    max_memo_size = 1024
+    max_reload_retries = 5
+    reload_retry_delay = 0.05
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.entries = []
+        self.titles = {}
+        self.memo = {}
+        self.built_at = None
+        self.dirty = None
+        self.thread = None
+        self.pending = set()
+        self.refresher = None
+
+    def get_keys(self, title_id, name):
+        name = normalize(name)
+        return [
+            (name[match.start():], title_id)
+            for match in re.finditer(r'\w+', name)
+        ]
+
+    def sort_key(self, title_id):
+        title = self.titles[title_id]
+        return (
+            title['rating'] is None, -(title['rating'] or 0),
+            -title['score_count'], title['name'], title_id
+        )
+
+    def build(self):
+        with self.build_lock:
+            self._build()
+
+    def _build(self):
+        # Изменения, пришедшие во время чтения из БД, могут не попасть
+        # в снимок: их id запоминаются и перечитываются после подмены.
+        with self.lock:
+            self.dirty = set()
+        titles = {
+            title['id']: title for title in Title.objects.values(
+                'id', 'name', 'year', 'rating', 'score_count')
+        }
+        entries = sorted(
+            key for title in titles.values()
+            for key in self.get_keys(title['id'], title['name'])
+        )
+        with self.lock:
+            self.titles, self.entries, self.memo = titles, entries, {}
+            self.built_at = time.monotonic()
+            dirty, self.dirty = self.dirty, None
+        if dirty:
+            self.reload(dirty)
+
+    def build_in_background(self):
+        try:
+            self._build()
+        finally:
+            self.build_lock.release()
+            connection.close()
+
+    def ensure_built(self):
+        if (
+            self.built_at is not None
+            and time.monotonic() - self.built_at
+            <= settings.AUTOCOMPLETE_REFRESH_SECONDS
+        ):
+            return
+        if self.build_lock.acquire(blocking=False):
+            self.thread = threading.Thread(
+                target=self.build_in_background, daemon=True)
+            self.thread.start()
+
+    def join(self):
+        for thread in (self.thread, self.refresher):
+            if thread is not None:
+                thread.join()
+
+    def remove(self, title_id):
+        with self.lock:
+            if self.dirty is not None:
+                self.dirty.add(title_id)
+            self._remove(title_id)
+            self.memo = {}
+
+    def _remove(self, title_id):
+        title = self.titles.pop(title_id, None)
+        if title is None:
+            return
+        for key in self.get_keys(title_id, title['name']):
+            position = bisect_left(self.entries, key)
+            if (
+                position < len(self.entries)
+                and self.entries[position] == key
+            ):
+                del self.entries[position]
+
+    def refresh(self, title_id):
+        # Изменённое произведение только помечается; его данные перечитывает
+        # фоновый поток, собирая накопившиеся id в один запрос.
+        with self.lock:
+            if self.dirty is not None:
+                self.dirty.add(title_id)
+            if self.built_at is None:
+                return
+            self.pending.add(title_id)
+            if self.refresher is None:
+                self.refresher = threading.Thread(
+                    target=self.reload_pending, daemon=True)
+                self.refresher.start()
+
+    def reload_pending(self):
+        failures = 0
+        try:
+            while True:
+                with self.lock:
+                    title_ids, self.pending = self.pending, set()
+                    if not title_ids:
+                        self.refresher = None
+                        return
+                try:
+                    self.reload(title_ids)
+                except DatabaseError:
+                    # Занятая БД не должна терять изменения: id возвращаются
+                    # в очередь и перечитываются с паузой.
+                    with self.lock:
+                        self.pending |= title_ids
+                    failures += 1
+                    if failures > self.max_reload_retries:
+                        logger.exception(
+                            'Не удалось обновить индекс автодополнения')
+                        with self.lock:
+                            self.refresher = None
+                        return
+                    time.sleep(self.reload_retry_delay * failures)
+                    connection.close()
+        except Exception:
+            with self.lock:
+                self.refresher = None
+            raise
+        finally:
+            connection.close()
+
+    def reload(self, title_ids):
+        titles = {
+            title['id']: title for title in Title.objects.filter(
+                pk__in=title_ids
+            ).values('id', 'name', 'year', 'rating', 'score_count')
+        }
+        with self.lock:
+            for title_id in title_ids:
+                self._remove(title_id)
+                title = titles.get(title_id)
+                if title is None:
+                    continue
+                self.titles[title_id] = title
+                for key in self.get_keys(title_id, title['name']):
+                    insort(self.entries, key)
+            self.memo = {}
+
+    def search(self, query, limit):
+        self.ensure_built()
+        prefix = normalize(query.strip())
+        if not prefix:
+            return []
+        with self.lock:
+            memo_key = (prefix, limit)
+            if memo_key in self.memo:
+                return self.memo[memo_key]
+            found = set()
+            position = bisect_left(self.entries, (prefix,))
+            while (
+                position < len(self.entries)
+                and self.entries[position][0].startswith(prefix)
+            ):
+                found.add(self.entries[position][1])
+                position += 1
+            result = [
+                self.titles[title_id]
+                for title_id in nsmallest(limit, found, key=self.sort_key)
+            ]
+            if len(self.memo) >= self.max_memo_size:
+                self.memo = {}
+            self.memo[memo_key] = result
+            return result
+
+
+title_index = TitleAutocompleteIndex()
@@ -0,0 +1,142 @@
+import hashlib
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+FACETS_KEY = 'api:facets:{}'
+
+
+class PreconditionFailed(APIException):
+    status_code = HTTPStatus.PRECONDITION_FAILED
+    default_detail = (
+        'Ресурс был изменён. Получите его актуальную версию и повторите '
+        'запрос.'
+    )
+    default_code = 'precondition_failed'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_versions(scopes):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Вытесненный из кэша счётчик начинается с текущего времени,
+            # чтобы не совпасть ни с одной из прежних версий.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    cache = get_cache()
+    for scope in scopes:
+        try:
+            cache.incr(VERSION_KEY.format(scope))
+        except ValueError:
+            pass
+
+
+def make_etag(*parts):
+    return quote_etag(
+        hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    )
+
+
+def check_conditions(request, etag, last_modified):
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+
+
+class CachedListMixin:
+    cache_scopes = ()
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+    def get_cache_key(self, request):
+        versions = get_versions(self.get_cache_scopes())
+        return RESPONSE_KEY.format(hashlib.md5(
+            f'{request.get_full_path()}|{versions}'.encode()
+        ).hexdigest())
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = get_cache().get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == HTTPStatus.OK:
+            get_cache().set(
+                key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs)
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalMixin:
+    def get_conditions(self):
+        return None, None
+
+    def get_object_conditions(self, obj):
+        return None, None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_conditions()
+        if etag is None and last_modified is None:
+            return handler(request, *args, **kwargs)
+        response = check_conditions(request, etag, last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            if etag:
+                response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(
+                    last_modified.timestamp())
+        return response
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.request.method not in SAFE_METHODS:
+            etag, last_modified = self.get_object_conditions(obj)
+            if (
+                (etag or last_modified)
+                and check_conditions(self.request, etag, last_modified)
+            ):
+                raise PreconditionFailed
+        return obj
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,38 @@
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+
+CONFIRMATION_KEY = 'auth:confirmation:{}'
+
+
+def get_cache():
+    return caches[settings.CONFIRMATION_CODE_CACHE_ALIAS]
+
+
+def get_random_code():
+    return ''.join(random.choices(
+        settings.CONFIRMATION_CODE_CHARS,
+        k=settings.CONFIRMATION_CODE_MAX_LENGTH
+    ))
+
+
+def issue_confirmation_code(user):
+    confirmation_code = get_random_code()
+    get_cache().set(
+        CONFIRMATION_KEY.format(user.pk),
+        confirmation_code,
+        settings.CONFIRMATION_CODE_TTL
+    )
+    return confirmation_code
+
+
+def pop_confirmation_code(user):
+    # Код одноразовый: его получает только тот запрос, который сумел
+    # удалить ключ, поэтому параллельные попытки не пройдут дважды.
+    cache = get_cache()
+    key = CONFIRMATION_KEY.format(user.pk)
+    confirmation_code = cache.get(key)
+    if confirmation_code is None or not cache.delete(key):
+        return None
+    return confirmation_code
@@ -0,0 +1,48 @@
+from django.db.models import Q
+from django.db.models.functions import Lower
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+# Верхняя граница диапазона для префикса: больше любого допустимого символа.
+MAX_CHAR = '\U0010ffff'
+
+
+class UserSearchFilter(filters.SearchFilter):
+    # icontains не может использовать индекс и просматривает всю таблицу,
+    # поэтому по умолчанию поиск идёт по диапазону уникального индекса
+    # username, а email сравнивается через индекс по LOWER(email).
+    # Выбранная стратегия сохраняется во view.search_strategy.
+    search_mode_param = 'search_mode'
+    strategies = ('exact', 'prefix', 'email', 'contains')
+
+    def get_strategy(self, request, value):
+        strategy = request.query_params.get(self.search_mode_param)
+        if strategy is None:
+            return 'email' if '@' in value else 'prefix'
+        if strategy not in self.strategies:
+            raise ValidationError({self.search_mode_param: (
+                f'Допустимые значения: {", ".join(self.strategies)}.'
+            )})
+        return strategy
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.search_param, '').strip()
+        if not value:
+            return queryset
+        strategy = self.get_strategy(request, value)
+        view.search_strategy = strategy
+        if strategy == 'exact':
+            return queryset.filter(username=value)
+        if strategy == 'prefix':
+            return queryset.filter(
+                username__gte=value,
+                username__lt=value + MAX_CHAR,
+                username__startswith=value,
+            )
+        if strategy == 'email':
+            return queryset.alias(email_lower=Lower('email')).filter(
+                Q(email_lower=value.lower()) | Q(username=value)
+            )
+        return queryset.filter(
+            Q(username__icontains=value) | Q(email__icontains=value)
+        )
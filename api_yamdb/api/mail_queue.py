@@ -0,0 +1,137 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+from itertools import count
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    # Письма отправляются фоновыми потоками: каждый поток забирает из
+    # очереди пачку писем и отправляет её через одно SMTP-соединение.
+    # Неудачные письма откладываются в кучу по времени повтора с растущей
+    # задержкой и не задерживают новые письма из очереди.
+    # При EMAIL_QUEUE_ASYNC = False письмо отправляется сразу.
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = []
+        self.retries = []
+        self.retry_condition = threading.Condition()
+        self.retry_sequence = count()
+        self.pending_retries = 0
+
+    def ensure_started(self):
+        with self.lock:
+            self.workers = [
+                worker for worker in self.workers if worker.is_alive()
+            ]
+            while len(self.workers) < settings.EMAIL_QUEUE_WORKERS:
+                worker = threading.Thread(
+                    target=self.work, name='mail-queue', daemon=True)
+                worker.start()
+                self.workers.append(worker)
+
+    def send(self, message):
+        if not settings.EMAIL_QUEUE_ASYNC:
+            message.send()
+            return
+        self.ensure_started()
+        self.queue.put((message, 0, 0))
+
+    def join(self):
+        self.queue.join()
+        with self.retry_condition:
+            while self.pending_retries:
+                self.retry_condition.wait()
+
+    def get_retry_timeout(self):
+        with self.retry_condition:
+            if not self.retries:
+                return None
+            return max(0, self.retries[0][0] - time.monotonic())
+
+    def pop_due_retries(self):
+        due = []
+        with self.retry_condition:
+            while (
+                self.retries and self.retries[0][0] <= time.monotonic()
+                and len(due) < settings.EMAIL_QUEUE_BATCH_SIZE
+            ):
+                ready_at, _, message, attempt = heapq.heappop(self.retries)
+                due.append((message, attempt, ready_at))
+        return due
+
+    def finish_retries(self, number):
+        with self.retry_condition:
+            self.pending_retries -= number
+            if not self.pending_retries:
+                self.retry_condition.notify_all()
+
+    def get_batch(self):
+        # Поток ждёт новые письма не дольше, чем до ближайшего повтора.
+        retries = self.pop_due_retries()
+        batch = []
+        if not retries:
+            try:
+                batch.append(self.queue.get(timeout=self.get_retry_timeout()))
+            except queue.Empty:
+                return batch, self.pop_due_retries()
+        while len(batch) + len(retries) < settings.EMAIL_QUEUE_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch, retries
+
+    def work(self):
+        while True:
+            batch, retries = self.get_batch()
+            try:
+                # None в очереди только будит поток ради нового повтора.
+                self.deliver([item for item in batch if item] + retries)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+                self.finish_retries(len(retries))
+
+    def deliver(self, batch):
+        if not batch:
+            return
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception:
+            for message, attempt, _ in batch:
+                self.retry(message, attempt)
+            return
+        try:
+            for message, attempt, _ in batch:
+                try:
+                    connection.send_messages([message])
+                except Exception:
+                    self.retry(message, attempt)
+        finally:
+            connection.close()
+
+    def retry(self, message, attempt):
+        if attempt >= settings.EMAIL_QUEUE_RETRIES:
+            logger.exception('Не удалось отправить письмо на %s', message.to)
+            return
+        with self.retry_condition:
+            heapq.heappush(self.retries, (
+                time.monotonic()
+                + settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** attempt,
+                next(self.retry_sequence), message, attempt + 1
+            ))
+            self.pending_retries += 1
+        self.queue.put(None)
+
+
+mail_queue = MailQueue()
@@ -0,0 +1,155 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination, _reverse_ordering)
+
+
+class KeysetPagination(CursorPagination):
+    # Последнее поле ordering должно быть уникальным (обычно 'id'),
+    # тогда позиция курсора однозначна и смещение не нужно.
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        queryset = queryset.order_by(
+            *(_reverse_ordering(self.ordering) if reverse else self.ordering)
+        )
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(
+                    self.decode_position(position, queryset.model), reverse)
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.next_position = self.previous_position = position
+        if self.page:
+            self.next_position = self._get_position_from_instance(
+                self.page[-1], self.ordering)
+            self.previous_position = self._get_position_from_instance(
+                self.page[0], self.ordering)
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_keyset_filter(self, values, reverse=False):
+        keyset_filter = Q()
+        equal = {}
+        for order, value in zip(self.ordering, values):
+            field = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') != reverse else 'gt'
+            keyset_filter |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return keyset_filter
+
+    def decode_position(self, position, model):
+        # Позиция приходит от клиента: значения приводятся к типам полей
+        # ordering, чтобы подделанный курсор давал 404, а не ошибку 500.
+        try:
+            values = json.loads(position)
+            if (
+                not isinstance(values, list)
+                or len(values) != len(self.ordering)
+            ):
+                raise ValueError
+            values = [
+                model._meta.get_field(order.lstrip('-')).to_python(value)
+                for order, value in zip(self.ordering, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field = order.lstrip('-')
+            value = (
+                instance[field] if isinstance(instance, dict)
+                else getattr(instance, field)
+            )
+            values.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value
+            )
+        return json.dumps(values)
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    # Курсорный режим включается параметром ?pagination=cursor
+    # или наличием ?cursor=...; по умолчанию остаётся постраничный.
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+    keyset_pagination_class = KeysetPagination
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.keyset_mode
+            or self.keyset_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if not self.use_keyset(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = self.keyset_pagination_class()
+        page = self.keyset.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.keyset.display_page_controls
+        return page
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.keyset:
+            return self.keyset.to_html()
+        return super().to_html()
+
+
+class TitleKeysetPagination(KeysetPagination):
+    ordering = ('-year', 'name', 'id')
+
+
+class TitlePagination(OptionalKeysetPagination):
+    keyset_pagination_class = TitleKeysetPagination
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class PubDatePagination(OptionalKeysetPagination):
+    keyset_pagination_class = PubDateKeysetPagination
@@ -21,7 +21,7 @@ class IsAuthorOrModeratorOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.id
             or (request.user.is_authenticated and (
                 request.user.is_moderator or request.user.is_admin
             ))
@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from reviews.models import RevokedToken
+
+
+class RevocationList:
+    # Отозванные jti хранятся в БД, а процесс держит их копию: фильтр
+    # Блума отсекает почти все неотозванные токены, точное множество
+    # исключает ложные срабатывания. Копия перечитывается из БД раз в
+    # REVOCATION_REFRESH_SECONDS.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bits = None
+        self.exact = set()
+        self.loaded_at = None
+
+    def get_positions(self, jti, size):
+        digest = hashlib.sha256(jti.encode()).digest()
+        return [
+            int.from_bytes(digest[offset:offset + 4], 'big') % size
+            for offset in range(0, 4 * settings.REVOCATION_BLOOM_HASHES, 4)
+        ]
+
+    def set_bits(self, bits, jti):
+        for position in self.get_positions(jti, len(bits) * 8):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def build(self, jtis=()):
+        jtis = set(jtis)
+        bits = bytearray(settings.REVOCATION_BLOOM_BITS // 8)
+        for jti in jtis:
+            self.set_bits(bits, jti)
+        with self.lock:
+            self.bits, self.exact = bits, jtis
+            self.loaded_at = time.monotonic()
+
+    def refresh(self):
+        self.build(RevokedToken.objects.filter(
+            expires_at__gt=timezone.now()
+        ).values_list('jti', flat=True))
+
+    def ensure_fresh(self):
+        if (
+            self.loaded_at is None
+            or time.monotonic() - self.loaded_at
+            > settings.REVOCATION_REFRESH_SECONDS
+        ):
+            self.refresh()
+
+    def clear(self):
+        self.build()
+
+    def add(self, jti):
+        if self.bits is None:
+            return
+        with self.lock:
+            self.set_bits(self.bits, jti)
+            self.exact.add(jti)
+
+    def is_revoked(self, jti):
+        self.ensure_fresh()
+        bits = self.bits
+        if not all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self.get_positions(jti, len(bits) * 8)
+        ):
+            return False
+        return jti in self.exact
+
+
+revoked_tokens = RevocationList()
+
+
+def revoke_token(jti):
+    RevokedToken.revoke(jti)
+    revoked_tokens.add(jti)
@@ -56,6 +56,18 @@ class TokenObtainSerializer(serializers.Serializer):
         return validate_username(username)
 
 
+class TokenRevokeSerializer(serializers.Serializer):
+    username = serializers.CharField(
+        max_length=USERNAME_MAX_LENGTH, required=False)
+    jti = serializers.CharField(max_length=255, required=False)
+
+    def validate(self, data):
+        if len(data) != 1:
+            raise ValidationError(
+                'Укажите либо `username`, либо `jti` отзываемого токена.')
+        return data
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -72,13 +84,33 @@ class TitleReadSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True)
+    histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True)
 
     class Meta:
         model = Title
         fields = read_only_fields = (
-            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+            'id', 'name', 'year', 'rating', 'histogram', 'description',
+            'genre', 'category'
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.wants_histogram(self.context.get('request')):
+            self.fields.pop('histogram')
+
+    @staticmethod
+    def wants_histogram(request):
+        return request is not None and request.query_params.get(
+            'histogram', '').lower() in ('1', 'true')
+
+
+class TitleAutocompleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    year = serializers.IntegerField()
+    rating = serializers.IntegerField(allow_null=True)
+
 
 class TitleWriteSerializer(serializers.ModelSerializer):
     genre = serializers.SlugRelatedField(
@@ -119,18 +151,6 @@ class ReviewSerializer(BaseAuthorSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        if (
-            (request := self.context['request']).method == 'POST'
-            and Review.objects.filter(
-                author=request.user,
-                title=self.context['view'].get_title()
-            ).exists()
-        ):
-            raise ValidationError(
-                'Вы уже оставляли отзыв к этому произведению.')
-        return data
-
 
 class CommentSerializer(BaseAuthorSerializer):
     class Meta:
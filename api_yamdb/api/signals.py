@@ -0,0 +1,111 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import forget_token_version, set_token_version
+from api.autocomplete import title_index
+from api.cache import bump_versions
+from reviews.models import (
+    TOKEN_CLAIM_FIELDS, Category, Comment, Genre, Review, Title, User)
+
+
+def bump_on_commit(*scopes):
+    # Версии меняются только после фиксации транзакции: иначе запрос,
+    # попавший между сбросом и COMMIT, закэширует старые строки под
+    # новой версией.
+    transaction.on_commit(partial(bump_versions, *scopes))
+
+
+@receiver((post_save, post_delete), sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_on_commit('categories')
+
+
+@receiver((post_save, post_delete), sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    bump_on_commit('genres')
+
+
+@receiver(post_save, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    bump_on_commit('titles', f'title:{instance.pk}')
+    transaction.on_commit(partial(title_index.refresh, instance.pk))
+
+
+@receiver(post_delete, sender=Title)
+def invalidate_deleted_title(sender, instance, **kwargs):
+    bump_on_commit('titles', f'title:{instance.pk}', f'reviews:{instance.pk}')
+    transaction.on_commit(partial(title_index.remove, instance.pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        title_ids = (instance.pk,)
+    elif pk_set is not None:
+        title_ids = pk_set
+    else:
+        bump_on_commit('titles', 'genres')
+        return
+    bump_on_commit(
+        'titles', *(f'title:{title_id}' for title_id in title_ids))
+
+
+@receiver(post_save, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    bump_on_commit(
+        'titles', f'title:{instance.title_id}', f'reviews:{instance.title_id}')
+    transaction.on_commit(partial(title_index.refresh, instance.title_id))
+
+
+@receiver(post_delete, sender=Review)
+def invalidate_deleted_review(sender, instance, **kwargs):
+    bump_on_commit(
+        'titles',
+        f'title:{instance.title_id}',
+        f'reviews:{instance.title_id}',
+        f'comments:{instance.pk}',
+    )
+    transaction.on_commit(partial(title_index.refresh, instance.title_id))
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    bump_on_commit(f'comments:{instance.review_id}')
+
+
+@receiver(post_save, sender=User)
+def invalidate_renamed_author(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_claims', None)
+    if (
+        created or loaded is None
+        or dict(zip(TOKEN_CLAIM_FIELDS, loaded))['username']
+        == instance.username
+    ):
+        return
+    title_ids = Review.objects.filter(
+        author=instance).values_list('title_id', flat=True).distinct()
+    review_ids = Comment.objects.filter(
+        author=instance).values_list('review_id', flat=True).distinct()
+    bump_on_commit(
+        *(f'reviews:{title_id}' for title_id in title_ids),
+        *(f'comments:{review_id}' for review_id in review_ids),
+    )
+
+
+@receiver(post_save, sender=User)
+def update_token_version(sender, instance, **kwargs):
+    if 'token_version' in instance.__dict__:
+        set_token_version(instance.pk, instance.token_version)
+    else:
+        forget_token_version(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user_tokens(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
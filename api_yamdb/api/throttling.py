@@ -0,0 +1,76 @@
+import hashlib
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_KEY = 'auth:throttle:{}:{}'
+THROTTLE_LOCK_TIMEOUT = 1
+
+
+class TokenBucketThrottle(BaseThrottle):
+    # Ведро на capacity запросов пополняется на capacity токенов за period
+    # секунд. Состояние хранится в кэше, поэтому проверка не трогает БД и
+    # выполняется до разбора данных сериализатором.
+    scope = 'ip'
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        ident = self.get_key(request)
+        if not ident:
+            return True
+        capacity, period = settings.AUTH_THROTTLE_RATES[self.scope]
+        rate = capacity / period
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        # Идентификатор хэшируется: в ключ кэша не попадают пробелы и
+        # управляющие символы из тела запроса.
+        key = THROTTLE_KEY.format(
+            self.scope, hashlib.sha256(ident.encode()).hexdigest())
+        if not self.acquire(cache, key):
+            self.retry_after = 1 / rate
+            return False
+        try:
+            now = time.time()
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.retry_after = (1 - tokens) / rate
+            cache.set(key, (tokens, now), period)
+        finally:
+            cache.delete(f'{key}:lock')
+        return allowed
+
+    def acquire(self, cache, key):
+        # Чтение и запись ведра выполняются под блокировкой на cache.add,
+        # иначе параллельные запросы прочитают одно и то же число токенов
+        # и пройдут все. Не дождавшийся блокировки запрос отклоняется.
+        deadline = time.monotonic() + THROTTLE_LOCK_TIMEOUT
+        while not cache.add(f'{key}:lock', True, THROTTLE_LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    scope = 'ip'
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    scope = 'username'
+
+    def get_key(self, request):
+        if not isinstance(request.data, Mapping):
+            return None
+        username = request.data.get('username')
+        return username if isinstance(username, str) else None
@@ -4,10 +4,13 @@ from rest_framework.routers import DefaultRouter
 from api.views import (
     CommentViewSet,
     CategoryViewSet,
+    export_data,
     GenreViewSet,
     ReviewViewSet,
     TitleViewSet,
+    token_cache_stats,
     token_obtain,
+    token_revoke,
     signup,
     UserViewSet,
 )
@@ -28,9 +31,12 @@ router_v1.register(
 auth_patterns = [
     path('signup/', signup, name='signup'),
     path('token/', token_obtain, name='token'),
+    path('token/cache/', token_cache_stats, name='token_cache'),
+    path('token/revoke/', token_revoke, name='token_revoke'),
 ]
 
 urlpatterns = [
     path('v1/auth/', include(auth_patterns)),
+    path('v1/export/<str:table>/', export_data, name='export'),
     path('v1/', include(router_v1.urls)),
 ]
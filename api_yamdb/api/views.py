@@ -1,27 +1,50 @@
-import random
+import hashlib
+from functools import partial
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.db.models import Exists, OuterRef
 from django.db.utils import IntegrityError
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django_filters import rest_framework
 from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import (
+    action, api_view, permission_classes, throttle_classes)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.permissions import (
     AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly)
-from rest_framework_simplejwt.tokens import AccessToken
 
+from api.authentication import RoleAccessToken, verified_tokens
+from api.autocomplete import title_index
+from api.cache import (
+    CachedListMixin,
+    CachedListRetrieveMixin,
+    ConditionalMixin,
+    FACETS_KEY,
+    get_cache,
+    get_versions,
+    make_etag,
+)
+from api.confirmation import (
+    issue_confirmation_code, pop_confirmation_code)
+from api.filters import UserSearchFilter
+from api.mail_queue import mail_queue
+from api.pagination import PubDatePagination, TitlePagination
 from api.serializers import (
     CategorySerializer,
     CommentSerializer,
     CurrentUserSerializer,
     GenreSerializer,
     ReviewSerializer,
+    TitleAutocompleteSerializer,
     TokenObtainSerializer,
+    TokenRevokeSerializer,
     TitleReadSerializer,
     TitleWriteSerializer,
     UserSerializer,
@@ -29,28 +52,27 @@ from api.serializers import (
 )
 from api.permissions import (
     IsAdmin, IsAdminOrReadOnly, IsAuthorOrModeratorOrAdmin)
+from api.revocation import revoke_token
+from api.throttling import AuthIPThrottle, AuthUsernameThrottle
+from reviews.export import FORMATS, TABLES, export
+from reviews.facets import FACETS, count_facets
 from reviews.models import Category, Genre, Review, Title, User
+from reviews.search import search_titles
 
 
 def send_confirmation_code(user, confirmation_code):
-    send_mail(
+    message = EmailMessage(
         'Код подтверждения',
         f'Ваш код подтверждения: {confirmation_code}',
         settings.DEFAULT_FROM_EMAIL,
         [user.email],
-        fail_silently=False
     )
-
-
-def get_random_code():
-    return ''.join(random.choices(
-        settings.CONFIRMATION_CODE_CHARS,
-        k=settings.CONFIRMATION_CODE_MAX_LENGTH
-    ))
+    transaction.on_commit(partial(mail_queue.send, message))
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def signup(request):
     serializer = UserSignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -68,27 +90,24 @@ def signup(request):
         raise ValidationError(
             {'email': 'Пользователь с таким email уже существует.'}
         )
-    user.confirmation_code = get_random_code()
-    user.save()
-    send_confirmation_code(user, user.confirmation_code)
+    send_confirmation_code(user, issue_confirmation_code(user))
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthUsernameThrottle])
 def token_obtain(request):
     serializer = TokenObtainSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     confirmation_code = serializer.validated_data['confirmation_code']
     user = get_object_or_404(
         User, username=serializer.validated_data['username'])
-    check_confirmation_code = user.confirmation_code
-    user.confirmation_code = settings.DEFAULT_CONFIRMATION_CODE
-    user.save()
-    if check_confirmation_code == settings.DEFAULT_CONFIRMATION_CODE:
-        raise ValidationError('Код подтверждения уже использован, или запрос '
-                              'на его получение не был отправлен. Отправьте '
-                              f'запрос на {reverse("signup")}.')
+    check_confirmation_code = pop_confirmation_code(user)
+    if check_confirmation_code is None:
+        raise ValidationError('Код подтверждения уже использован, истёк, или '
+                              'запрос на его получение не был отправлен. '
+                              f'Отправьте запрос на {reverse("signup")}.')
     if (check_confirmation_code != confirmation_code
             or not confirmation_code.isdigit()):
         raise ValidationError(
@@ -96,19 +115,63 @@ def token_obtain(request):
                 'Неверный код подтверждения. Для получения нового кода '
                 f'повторите запрос на {reverse("signup")}.')})
     return Response(
-        {'token': str(AccessToken.for_user(user))},
+        {'token': str(RoleAccessToken.for_user(user))},
         status=status.HTTP_200_OK
     )
 
 
+@api_view(['POST'])
+@permission_classes([IsAdmin])
+def token_revoke(request):
+    serializer = TokenRevokeSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    if 'username' in serializer.validated_data:
+        get_object_or_404(
+            User, username=serializer.validated_data['username']
+        ).revoke_tokens()
+    else:
+        revoke_token(serializer.validated_data['jti'])
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def token_cache_stats(request):
+    return Response(verified_tokens.stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def export_data(request, table):
+    file_format = request.query_params.get('output', 'csv')
+    if table not in TABLES or file_format not in FORMATS:
+        raise NotFound(
+            f'Доступные таблицы: {", ".join(TABLES)}; '
+            f'форматы: {", ".join(FORMATS)}.'
+        )
+    response = StreamingHttpResponse(
+        export(table, file_format), content_type=FORMATS[file_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}.{file_format}"'
+    )
+    return response
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAdmin,)
     lookup_field = 'username'
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('username',)
+    filter_backends = (UserSearchFilter,)
     http_method_names = ('get', 'post', 'patch', 'delete')
+    search_strategy = None
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if self.search_strategy:
+            response['X-Search-Strategy'] = self.search_strategy
+        return response
 
     @action(
         detail=False,
@@ -117,17 +180,26 @@ class UserViewSet(viewsets.ModelViewSet):
         url_path=settings.RESERVED_NAME,
     )
     def user_profile(self, request):
+        # request.user собран из токена, поэтому профиль читается целиком.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
-            return Response(UserSerializer(request.user).data)
+            return Response(UserSerializer(user).data)
         serializer = CurrentUserSerializer(
-            request.user, data=request.data, partial=True
+            user, data=request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
+        token_version = user.token_version
         serializer.save()
-        return Response(serializer.data)
+        data = serializer.data
+        if user.token_version != token_version:
+            # Смена username отзывает выданные токены, поэтому новый токен
+            # возвращается вместе с профилем.
+            data = {**data, 'token': str(RoleAccessToken.for_user(user))}
+        return Response(data)
 
 
 class AdminCreateDestroySlugViewSet(
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -143,64 +215,252 @@ class AdminCreateDestroySlugViewSet(
 class CategoryViewSet(AdminCreateDestroySlugViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_scopes = ('categories',)
 
 
 class GenreViewSet(AdminCreateDestroySlugViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_scopes = ('genres',)
 
 
 class TitleFilter(rest_framework.FilterSet):
     category = rest_framework.CharFilter(field_name='category__slug')
-    genre = rest_framework.CharFilter(field_name='genre__slug')
+    genre = rest_framework.CharFilter(method='filter_genre')
+    genre_mode = rest_framework.ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')),
+        method='filter_genre_mode',
+    )
+    search = rest_framework.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
 
-
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).order_by(*Title._meta.ordering)
+    def filter_genre(self, queryset, name, value):
+        # EXISTS вместо JOIN по genre: строки произведений не размножаются,
+        # а подзапрос идёт по уникальному индексу (title_id, genre_id).
+        slugs = dict.fromkeys(filter(None, map(str.strip, value.split(','))))
+        if not slugs:
+            return queryset
+        genres = Title.genre.through.objects.filter(title_id=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_mode') == 'all':
+            for slug in slugs:
+                queryset = queryset.filter(
+                    Exists(genres.filter(genre__slug=slug)))
+            return queryset
+        return queryset.filter(Exists(genres.filter(genre__slug__in=slugs)))
+
+    def filter_genre_mode(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class TitleViewSet(
+    ConditionalMixin, CachedListRetrieveMixin, viewsets.ModelViewSet
+):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     filter_backends = (rest_framework.DjangoFilterBackend,)
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
     permission_classes = (IsAdminOrReadOnly,)
     http_method_names = ('get', 'post', 'patch', 'delete')
+    facets = ()
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
+        if self.action == 'autocomplete':
+            return TitleAutocompleteSerializer
         return TitleWriteSerializer
 
+    @action(detail=False, methods=('get',))
+    def autocomplete(self, request):
+        try:
+            limit = min(
+                int(request.query_params.get(
+                    'limit', settings.AUTOCOMPLETE_LIMIT)),
+                settings.AUTOCOMPLETE_MAX_LIMIT
+            )
+        except ValueError:
+            raise ValidationError({'limit': 'Укажите целое число.'})
+        return Response(self.get_serializer(
+            title_index.search(request.query_params.get('q', ''), limit),
+            many=True
+        ).data)
+
+    def get_facets(self):
+        value = self.request.query_params.get('facets')
+        if value is None:
+            return ()
+        facets = tuple(
+            dict.fromkeys(filter(None, map(str.strip, value.split(','))))
+        )
+        if not facets or not set(facets) <= set(FACETS):
+            raise ValidationError(
+                {'facets': f'Допустимые значения: {", ".join(FACETS)}.'}
+            )
+        return facets
+
+    def get_facet_counts(self):
+        # Счётчики зависят только от фильтров, поэтому кэшируются отдельно
+        # от страниц выдачи и переиспользуются при пагинации.
+        params = sorted(
+            (name, self.request.query_params.getlist(name))
+            for name in self.filterset_class.base_filters
+            if name in self.request.query_params
+        )
+        key = FACETS_KEY.format(hashlib.md5(
+            f'{params}|{self.facets}|'
+            f'{get_versions(("titles", "categories", "genres"))}'.encode()
+        ).hexdigest())
+        counts = get_cache().get(key)
+        if counts is None:
+            counts = count_facets(
+                self.filter_queryset(self.get_queryset()), self.facets)
+            get_cache().set(key, counts, settings.RESPONSE_CACHE_TIMEOUT)
+        return counts
+
+    def list(self, request, *args, **kwargs):
+        self.facets = self.get_facets()
+        return super().list(request, *args, **kwargs)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.facets:
+            response.data['facets'] = self.get_facet_counts()
+        return response
+
+    def get_cache_scopes(self):
+        if self.action == 'retrieve':
+            return (f'title:{self.kwargs["pk"]}', 'categories', 'genres')
+        return ('titles', 'categories', 'genres')
+
+    def make_title_etag(self, title_id, modified, histogram=False):
+        # Версия title:{pk} меняется и при изменениях, не трогающих
+        # modified: жанры произведения, рейтинг.
+        return make_etag(
+            'title', title_id, modified.isoformat(),
+            *get_versions((f'title:{title_id}', 'categories', 'genres')),
+            *(('histogram',) if histogram else ())
+        )
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_conditions(self):
+        if self.action != 'retrieve':
+            return None, None
+        modified = Title.objects.filter(
+            pk=self.kwargs['pk']
+        ).values_list('modified', flat=True).first()
+        if modified is None:
+            return None, None
+        return self.make_title_etag(
+            self.kwargs['pk'], modified,
+            TitleReadSerializer.wants_histogram(self.request)
+        ), modified
+
+    def get_object_conditions(self, title):
+        return self.make_title_etag(title.pk, title.modified), title.modified
+
+
+class ReviewViewSet(
+    ConditionalMixin, CachedListRetrieveMixin, viewsets.ModelViewSet
+):
     serializer_class = ReviewSerializer
+    pagination_class = PubDatePagination
     permission_classes = (
         IsAuthenticatedOrReadOnly, IsAuthorOrModeratorOrAdmin,)
     http_method_names = ('get', 'post', 'patch', 'delete')
 
-    def get_title(self):
+    @cached_property
+    def title(self):
         return get_object_or_404(Title, id=self.kwargs['title_id'])
 
-    def get_queryset(self):
-        return self.get_title().reviews.select_related('title')
+    def get_title(self):
+        return self.title
 
-    def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+    def get_cache_scopes(self):
+        return (f'reviews:{self.kwargs["title_id"]}',)
 
+    def get_feed_version(self):
+        # Версия ленты меняется и при переименовании автора, которое не
+        # затрагивает поля modified отзыва и произведения.
+        return get_versions(self.get_cache_scopes())[0]
 
-class CommentViewSet(viewsets.ModelViewSet):
+    def make_review_etag(self, review_id, modified):
+        return make_etag(
+            'review', review_id, modified.isoformat(),
+            self.get_feed_version()
+        )
+
+    def get_conditions(self):
+        if self.action == 'list':
+            modified = Title.objects.filter(
+                pk=self.kwargs['title_id']
+            ).values_list('modified', flat=True).first()
+            if modified is None:
+                return None, None
+            return make_etag(
+                'reviews', self.request.get_full_path(), modified.isoformat(),
+                self.get_feed_version()
+            ), modified
+        if self.action == 'retrieve':
+            modified = Review.objects.filter(
+                pk=self.kwargs['pk'], title_id=self.kwargs['title_id']
+            ).values_list('modified', flat=True).first()
+            if modified is None:
+                return None, None
+            return self.make_review_etag(self.kwargs['pk'], modified), modified
+        return None, None
+
+    def get_object_conditions(self, review):
+        return self.make_review_etag(review.pk, review.modified), (
+            review.modified
+        )
+
+    def get_queryset(self):
+        return self.get_title().reviews.select_related('author')
+
+    def perform_create(self, serializer):
+        # Повторный отзыв отсекает ограничение unique_review; проверка
+        # существования выполняется только после ошибки вставки.
+        try:
+            serializer.save(author=self.request.user, title=self.get_title())
+        except IntegrityError:
+            if not Review.objects.filter(
+                author_id=self.request.user.id, title=self.get_title()
+            ).exists():
+                raise
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Вы уже оставляли отзыв к этому произведению.'
+            ]})
+
+
+class CommentViewSet(CachedListRetrieveMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = PubDatePagination
     permission_classes = (
         IsAuthenticatedOrReadOnly, IsAuthorOrModeratorOrAdmin,)
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    @cached_property
+    def review(self):
+        return get_object_or_404(
+            Review, id=self.kwargs['review_id'],
+            title_id=self.kwargs['title_id']
+        )
+
     def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs['review_id'])
+        return self.review
+
+    def get_cache_scopes(self):
+        return (f'comments:{self.kwargs["review_id"]}',)
 
     def get_queryset(self):
-        return self.get_review().comments.select_related('review')
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
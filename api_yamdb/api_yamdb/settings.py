@@ -62,6 +62,24 @@ DATABASES = {
     }
 }
 
+# Коды подтверждения должны быть видны всем процессам сервера и
+# переживать перезапуск, поэтому хранятся в файлах, а не в памяти
+# процесса. Если серверов несколько, каталог должен быть общим для них
+# (или кэш заменяется на Redis/Memcached с тем же псевдонимом).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'confirmation': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'confirmation',
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'tokens',
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -79,13 +97,16 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Число доверенных прокси перед приложением. При 0 клиент определяется
+    # по REMOTE_ADDR, а подделанный X-Forwarded-For не обходит лимиты.
+    'NUM_PROXIES': 0,
 }
 
 SIMPLE_JWT = {
@@ -117,4 +138,38 @@ RESERVED_NAME = 'me'
 
 CONFIRMATION_CODE_MAX_LENGTH = 6
 CONFIRMATION_CODE_CHARS = "0123456789"
-DEFAULT_CONFIRMATION_CODE = 'FFFFFF'
+CONFIRMATION_CODE_TTL = 60 * 60
+CONFIRMATION_CODE_CACHE_ALIAS = 'confirmation'
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60 * 10
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+AUTOCOMPLETE_REFRESH_SECONDS = 60 * 5
+
+EMAIL_QUEUE_ASYNC = True
+EMAIL_QUEUE_WORKERS = 2
+EMAIL_QUEUE_BATCH_SIZE = 50
+EMAIL_QUEUE_RETRIES = 3
+EMAIL_QUEUE_RETRY_DELAY = 5
+
+THROTTLE_CACHE_ALIAS = 'default'
+# Сколько запросов к /auth/ допускается за сколько секунд.
+AUTH_THROTTLE_RATES = {
+    'ip': (20, 60),
+    'username': (10, 60),
+}
+
+# Версии токенов хранятся в общем для всех процессов кэше: смена роли
+# или отзыв токенов сразу видны каждому процессу сервера.
+TOKEN_VERSION_CACHE_ALIAS = 'tokens'
+# Как долго закэшированная версия токенов считается актуальной, если она
+# изменилась в БД в обход User.save().
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
+VERIFIED_TOKEN_CACHE_SIZE = 10000
+
+REVOCATION_REFRESH_SECONDS = 30
+REVOCATION_BLOOM_BITS = 2 ** 20
+REVOCATION_BLOOM_HASHES = 4
@@ -0,0 +1,90 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews.models import Comment, Review, Title
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+TITLE_FIELDS = (
+    'id', 'name', 'year', 'description', 'rating', 'category', 'genre'
+)
+REVIEW_FIELDS = ('id', 'title_id', 'text', 'author', 'score', 'pub_date')
+COMMENT_FIELDS = ('id', 'review_id', 'text', 'author', 'pub_date')
+
+
+def export_titles(chunk_size=CHUNK_SIZE):
+    # Жанры читаются отдельным потоком, упорядоченным по title_id, и
+    # сливаются с потоком произведений: iterator() не поддерживает
+    # prefetch_related, а память не должна расти с размером каталога.
+    genres = Title.genre.through.objects.order_by(
+        'title_id', 'genre__slug'
+    ).values_list('title_id', 'genre__slug').iterator(chunk_size=chunk_size)
+    pair = next(genres, None)
+    for title in Title.objects.order_by('id').values(
+        'id', 'name', 'year', 'description', 'rating', 'category__slug'
+    ).iterator(chunk_size=chunk_size):
+        title['category'] = title.pop('category__slug')
+        title['genre'] = []
+        while pair is not None and pair[0] <= title['id']:
+            if pair[0] == title['id']:
+                title['genre'].append(pair[1])
+            pair = next(genres, None)
+        yield title
+
+
+def export_reviews(chunk_size=CHUNK_SIZE):
+    for review in Review.objects.order_by('id').values(
+        'id', 'title_id', 'text', 'author__username', 'score', 'pub_date'
+    ).iterator(chunk_size=chunk_size):
+        review['author'] = review.pop('author__username')
+        yield review
+
+
+def export_comments(chunk_size=CHUNK_SIZE):
+    for comment in Comment.objects.order_by('id').values(
+        'id', 'review_id', 'text', 'author__username', 'pub_date'
+    ).iterator(chunk_size=chunk_size):
+        comment['author'] = comment.pop('author__username')
+        yield comment
+
+
+TABLES = {
+    'titles': (export_titles, TITLE_FIELDS),
+    'reviews': (export_reviews, REVIEW_FIELDS),
+    'comments': (export_comments, COMMENT_FIELDS),
+}
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(
+            ','.join(row[field]) if field == 'genre' else row[field]
+            for field in fields
+        )
+
+
+def render_ndjson(rows, fields):
+    for row in rows:
+        yield json.dumps(
+            {field: row[field] for field in fields},
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+        ) + '\n'
+
+
+def export(table, file_format, chunk_size=CHUNK_SIZE):
+    export_rows, fields = TABLES[table]
+    render = render_csv if file_format == 'csv' else render_ndjson
+    return render(export_rows(chunk_size), fields)
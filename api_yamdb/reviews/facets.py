@@ -0,0 +1,42 @@
+from collections import Counter
+
+from django.db.models import Count, F
+
+from reviews.models import Title
+
+FACETS = ('category', 'genre', 'year')
+
+
+def format_counts(counts):
+    return [
+        {'value': value, 'count': count}
+        for value, count in sorted(
+            counts.items(), key=lambda item: (-item[1], str(item[0]))
+        )
+    ]
+
+
+def count_facets(queryset, facets):
+    # Категории и десятилетия считаются одним GROUP BY по паре значений,
+    # жанры — вторым запросом по промежуточной таблице.
+    title_ids = queryset.order_by().values('pk')
+    result = {}
+    if 'category' in facets or 'year' in facets:
+        categories, decades = Counter(), Counter()
+        for group in Title.objects.filter(pk__in=title_ids).order_by().values(
+            'category__slug', decade=F('year') / 10 * 10
+        ).annotate(count=Count('id')):
+            categories[group['category__slug']] += group['count']
+            decades[group['decade']] += group['count']
+        if 'category' in facets:
+            result['category'] = format_counts(categories)
+        if 'year' in facets:
+            result['year'] = format_counts(decades)
+    if 'genre' in facets:
+        result['genre'] = format_counts({
+            group['genre__slug']: group['count']
+            for group in Title.genre.through.objects.filter(
+                title_id__in=title_ids
+            ).order_by().values('genre__slug').annotate(count=Count('id'))
+        })
+    return {facet: result[facet] for facet in facets}
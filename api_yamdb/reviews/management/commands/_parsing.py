@@ -0,0 +1,13 @@
+def parse_rows(rows, columns, int_columns):
+    parsed_rows, errors = [], []
+    for row in rows:
+        try:
+            parsed = {column: row[column] for column in columns}
+            for column in int_columns:
+                parsed[column] = int(row[column])
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append((row.get('id'), repr(e)))
+            parsed_rows.append(None)
+        else:
+            parsed_rows.append(parsed)
+    return parsed_rows, errors
@@ -0,0 +1,58 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.export import CHUNK_SIZE, FORMATS, TABLES, export
+
+
+class Command(BaseCommand):
+    help = 'Выгрузить произведения, отзывы и комментарии в CSV или NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables',
+            nargs='*',
+            help=(
+                f'Какие таблицы выгрузить: {", ".join(TABLES)} '
+                '(по умолчанию все).'
+            )
+        )
+        parser.add_argument(
+            '--format',
+            choices=tuple(FORMATS),
+            default='csv',
+            help='Формат файлов выгрузки.'
+        )
+        parser.add_argument(
+            '--output-dir',
+            default='.',
+            help='Папка, в которую записываются файлы выгрузки.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько строк читать из БД за один раз.'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['tables']) - set(TABLES)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные таблицы: {", ".join(sorted(unknown))}.')
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for table in options['tables'] or TABLES:
+            file_path = os.path.join(
+                options['output_dir'], f'{table}.{options["format"]}')
+            rows = 0
+            with open(file_path, 'w', encoding='utf-8', newline='') as file:
+                for line in export(
+                    table, options['format'], options['chunk_size']
+                ):
+                    file.write(line)
+                    rows += 1
+            if options['format'] == 'csv':
+                rows -= 1
+            self.stdout.write(self.style.SUCCESS(
+                f'Таблица {table} выгружена в {file_path}: {rows} строк.'
+            ))
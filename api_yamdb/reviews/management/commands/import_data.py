@@ -1,26 +1,42 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from csv import DictReader
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
 
+from api.cache import bump_versions
+from reviews.management.commands._parsing import parse_rows
 from reviews.models import Category, Genre, Title, Review, Comment, User
+from reviews.search import rebuild_search_index
 
 
 data_files = [
     {
         'model': Category,
         'file_path': 'static/data/category.csv',
-        'fields': ('id', 'name', 'slug')
+        'fields': ('id', 'name', 'slug'),
+        'cache_scopes': lambda obj: ('categories',)
     },
     {
         'model': Genre,
         'file_path': 'static/data/genre.csv',
-        'fields': ('id', 'name', 'slug')
+        'fields': ('id', 'name', 'slug'),
+        'cache_scopes': lambda obj: ('genres',)
     },
     {
         'model': Title,
         'file_path': 'static/data/titles.csv',
         'fields': ('id', 'name', 'year'),
-        'foreign_keys': {'category': (Category, 'category')}
+        'foreign_keys': {'category': (Category, 'category')},
+        'cache_scopes': lambda obj: (f'title:{obj.pk}',)
     },
     {
         'model': User,
@@ -37,7 +53,9 @@ data_files = [
         'foreign_keys': {
             'title': (Title, 'title_id'),
             'author': (User, 'author')
-        }
+        },
+        'cache_scopes': lambda obj: (
+            f'title:{obj.title_id}', f'reviews:{obj.title_id}')
     },
     {
         'model': Comment,
@@ -46,7 +64,8 @@ data_files = [
         'foreign_keys': {
             'review': (Review, 'review_id'),
             'author': (User, 'author')
-        }
+        },
+        'cache_scopes': lambda obj: (f'comments:{obj.review_id}',)
     },
     {
         'model': Title.genre.through,
@@ -55,43 +74,479 @@ data_files = [
         'foreign_keys': {
             'title': (Title, 'title_id'),
             'genre': (Genre, 'genre_id')
-        }
+        },
+        'cache_scopes': lambda obj: (f'title:{obj.title_id}',)
     },
 ]
 
 
+def get_load_levels(data_files):
+    models = {data_file['model'] for data_file in data_files}
+    pending, loaded, levels = list(data_files), set(), []
+    while pending:
+        level = [
+            data_file for data_file in pending
+            if all(
+                foreign_key_model in loaded
+                or foreign_key_model not in models
+                for foreign_key_model, _ in data_file.get(
+                    'foreign_keys', {}).values()
+            )
+        ]
+        if not level:
+            raise CommandError(
+                'Циклическая зависимость между таблицами: '
+                + ', '.join(
+                    data_file['model'].__name__ for data_file in pending)
+            )
+        levels.append(level)
+        loaded.update(data_file['model'] for data_file in level)
+        pending = [
+            data_file for data_file in pending if data_file not in level]
+    return levels
+
+
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.offsets = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.offsets = json.load(file)
+
+    def get(self, file_path):
+        return self.offsets.get(file_path, 0)
+
+    def save(self, file_path, offset):
+        if not self.path:
+            return
+        with self.lock:
+            self.offsets[file_path] = offset
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.offsets, file)
+            os.replace(temp_path, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class Command(BaseCommand):
     help = 'Загрузить данные из CSV-файлов в БД'
 
-    def handle(self, *args, **kwargs):
-        for data_file in data_files:
-            model = data_file['model']
-            print(f'Загрузка данных в таблицу {model.__name__}...')
-            with open(data_file['file_path'], encoding='utf-8') as file:
-                for row in DictReader(file):
-                    try:
-                        obj_data = {
-                            field: row[field] for field in data_file['fields']
-                        }
-                        if 'foreign_keys' in data_file:
-                            for foreign_key_field, (
-                                foreign_key_model, foreign_key_value
-                            ) in data_file['foreign_keys'].items():
-                                obj_data[foreign_key_field] = (
-                                    foreign_key_model.objects.get(
-                                        id=row[foreign_key_value]
-                                    )
-                                )
-                        model.objects.create(**obj_data)
-                    except Exception as e:
-                        print(
-                            f'Ошибка при загрузке в таблицу {model.__name__} '
-                            f'данных с id={row["id"]}: {e}'
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Загружать данные пакетами через bulk_create.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном пакете (для --bulk).'
+        )
+        parser.add_argument(
+            '--progress-every',
+            type=int,
+            default=10000,
+            help='Сообщать о прогрессе каждые N строк (для --bulk).'
+        )
+        parser.add_argument(
+            '--parallel',
+            action='store_true',
+            help=(
+                'Разбирать CSV-файлы в пуле процессов и загружать '
+                'независимые таблицы одновременно (включает --bulk).'
+            )
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов для разбора CSV (для --parallel).'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help=(
+                'Обновлять существующие записи по первичному ключу вместо '
+                'ошибки о дубликате (включает --bulk).'
+            )
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'Файл контрольной точки: в него записывается смещение '
+                'последней сохранённой строки каждого CSV-файла, а при '
+                'повторном запуске загрузка продолжается с этого места '
+                '(включает --bulk).'
+            )
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help=(
+                'Ничего не записывать, только посчитать, сколько строк '
+                'будет добавлено, обновлено и пропущено (включает --bulk).'
+            )
+        )
+
+    def handle(self, *args, **options):
+        self.upsert = options['upsert']
+        self.dry_run = options['dry_run']
+        self.checkpoint = Checkpoint(options['checkpoint'])
+        self.planned_ids = {}
+        self.cache_scopes = set()
+        self.changed_authors = set()
+        self.scopes_lock = threading.Lock()
+        bulk = any(
+            options[option] for option in
+            ('bulk', 'parallel', 'upsert', 'checkpoint', 'dry_run')
+        )
+        if options['parallel']:
+            self.parallel_load(options)
+        elif bulk:
+            for data_file in data_files:
+                self.timed(
+                    data_file, self.bulk_load, data_file,
+                    self.read_rows(data_file), options['batch_size'],
+                    options['progress_every']
+                )
+        else:
+            for data_file in data_files:
+                self.load(data_file)
+        if bulk and not self.dry_run:
+            Title.objects.recalculate_scores()
+            rebuild_search_index()
+            self.invalidate_caches()
+            self.checkpoint.clear()
+
+    def invalidate_caches(self):
+        # bulk_create и bulk_update не посылают сигналов, поэтому версии
+        # кэша ответов сбрасываются по итогам загрузки. Для авторов
+        # с изменёнными данными сбрасываются их ленты отзывов и комментариев.
+        scopes = self.cache_scopes
+        if self.changed_authors:
+            scopes.update(
+                f'reviews:{title_id}' for title_id in Review.objects.filter(
+                    author_id__in=self.changed_authors
+                ).values_list('title_id', flat=True).distinct()
+            )
+            scopes.update(
+                f'comments:{review_id}'
+                for review_id in Comment.objects.filter(
+                    author_id__in=self.changed_authors
+                ).values_list('review_id', flat=True).distinct()
+            )
+        if scopes:
+            bump_versions('titles', *scopes)
+
+    def parallel_load(self, options):
+        # SQLite допускает только одного писателя, поэтому таблицы одного
+        # уровня загружаются по очереди; разбор CSV всё равно параллелен.
+        load_workers = 1 if connection.vendor == 'sqlite' else None
+        with ProcessPoolExecutor(options['workers']) as parsers:
+            for level in get_load_levels(data_files):
+                with ThreadPoolExecutor(load_workers or len(level)) as loaders:
+                    for future in [
+                        loaders.submit(
+                            self.load_parsed, data_file, parsers, options
                         )
-                    else:
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'Данные с id={row["id"]} загружены в таблицу '
-                                f'{model.__name__} успешно.'
+                        for data_file in level
+                    ]:
+                        future.result()
+
+    def load_parsed(self, data_file, parsers, options):
+        try:
+            self.timed(
+                data_file, self.bulk_load, data_file,
+                self.parse_chunks(
+                    data_file, parsers, options['batch_size'],
+                    options['workers']
+                ),
+                options['batch_size'], options['progress_every']
+            )
+        finally:
+            connection.close()
+
+    def parse_chunks(self, data_file, parsers, chunk_size, workers):
+        # Файл читается кусками по chunk_size строк, и в пуле одновременно
+        # разбирается не больше двух кусков на процесс: память ограничена
+        # размером пакета, а не размером CSV-файла.
+        columns = self.get_columns(data_file)
+        rows = self.read_rows(data_file)
+        pending = deque()
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if chunk:
+                pending.append(parsers.submit(parse_rows, chunk, *columns))
+            if pending and (not chunk or len(pending) >= 2 * workers):
+                yield from self.collect_parsed(data_file, pending.popleft())
+            elif not chunk:
+                return
+
+    def collect_parsed(self, data_file, future):
+        parsed_rows, errors = future.result()
+        for row_id, error in errors:
+            self.stderr.write(
+                f'Ошибка при загрузке в таблицу '
+                f'{data_file["model"].__name__} '
+                f'данных с id={row_id}: {error}'
+            )
+        return parsed_rows
+
+    def get_columns(self, data_file):
+        foreign_key_columns = [
+            foreign_key_value for _, foreign_key_value
+            in data_file.get('foreign_keys', {}).values()
+        ]
+        int_columns = [
+            column for column in ('id',) if column in data_file['fields']
+        ] + foreign_key_columns
+        return (
+            list(dict.fromkeys((*data_file['fields'], *foreign_key_columns))),
+            int_columns,
+        )
+
+    def timed(self, data_file, loader, *args):
+        started = time.perf_counter()
+        loader(*args)
+        self.stdout.write(
+            f'Таблица {data_file["model"].__name__} загружена за '
+            f'{time.perf_counter() - started:.2f} с.'
+        )
+
+    def read_rows(self, data_file):
+        with open(data_file['file_path'], encoding='utf-8') as file:
+            yield from DictReader(file)
+
+    def load(self, data_file):
+        model = data_file['model']
+        print(f'Загрузка данных в таблицу {model.__name__}...')
+        with open(data_file['file_path'], encoding='utf-8') as file:
+            for row in DictReader(file):
+                try:
+                    obj_data = {
+                        field: row[field] for field in data_file['fields']
+                    }
+                    if 'foreign_keys' in data_file:
+                        for foreign_key_field, (
+                            foreign_key_model, foreign_key_value
+                        ) in data_file['foreign_keys'].items():
+                            obj_data[foreign_key_field] = (
+                                foreign_key_model.objects.get(
+                                    id=row[foreign_key_value]
+                                )
                             )
+                    model.objects.create(**obj_data)
+                except Exception as e:
+                    print(
+                        f'Ошибка при загрузке в таблицу {model.__name__} '
+                        f'данных с id={row["id"]}: {e}'
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'Данные с id={row["id"]} загружены в таблицу '
+                            f'{model.__name__} успешно.'
                         )
+                    )
+
+    def get_known_ids(self, model):
+        ids = set(model.objects.values_list('id', flat=True))
+        ids.update(self.planned_ids.get(model, ()))
+        return ids
+
+    def bulk_load(self, data_file, rows, batch_size, progress_every):
+        model = data_file['model']
+        file_path = data_file['file_path']
+        self.stdout.write(f'Загрузка данных в таблицу {model.__name__}...')
+        foreign_keys = {
+            foreign_key_field: (
+                foreign_key_value, self.get_known_ids(foreign_key_model)
+            )
+            for foreign_key_field, (foreign_key_model, foreign_key_value)
+            in data_file.get('foreign_keys', {}).items()
+        }
+        offset = self.checkpoint.get(file_path)
+        if offset:
+            self.stdout.write(
+                f'{model.__name__}: продолжение со строки {offset + 1}.')
+        batch = []
+        counts = dict(inserted=0, updated=0, skipped=0, failed=0)
+        number = offset
+        for number, row in enumerate(islice(rows, offset, None), offset + 1):
+            obj = self.build_object(model, data_file, foreign_keys, row)
+            if obj is None:
+                counts['failed'] += 1
+            else:
+                batch.append(obj)
+            if len(batch) >= batch_size:
+                self.flush(data_file, batch, counts, number)
+                batch = []
+            if number % progress_every == 0:
+                self.stdout.write(
+                    f'{model.__name__}: обработано {number} строк.'
+                )
+        self.flush(data_file, batch, counts, number)
+        if not self.dry_run:
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model]
+                ):
+                    cursor.execute(sql)
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Пробный запуск: " if self.dry_run else ""}'
+            f'таблица {model.__name__}: добавлено {counts["inserted"]}, '
+            f'обновлено {counts["updated"]}, пропущено {counts["skipped"]}, '
+            f'ошибок {counts["failed"]}.'
+        ))
+
+    def flush(self, data_file, batch, counts, offset):
+        inserted, updated, skipped = self.write_batch(data_file, batch)
+        counts['inserted'] += inserted
+        counts['updated'] += updated
+        counts['skipped'] += skipped
+        if not self.dry_run:
+            self.checkpoint.save(data_file['file_path'], offset)
+
+    def build_object(self, model, data_file, foreign_keys, row):
+        if row is None:
+            return None
+        try:
+            obj_data = {field: row[field] for field in data_file['fields']}
+            for foreign_key_field, (
+                foreign_key_value, ids
+            ) in foreign_keys.items():
+                foreign_key_id = int(row[foreign_key_value])
+                if foreign_key_id not in ids:
+                    raise ValueError(
+                        f'{foreign_key_field} с id={foreign_key_id} '
+                        'не существует.'
+                    )
+                obj_data[f'{foreign_key_field}_id'] = foreign_key_id
+            return model(**obj_data)
+        except (KeyError, TypeError, ValueError) as e:
+            self.stderr.write(
+                f'Ошибка при загрузке в таблицу {model.__name__} '
+                f'данных с id={row.get("id")}: {e}'
+            )
+            return None
+
+    def get_key_fields(self, data_file):
+        if 'id' in data_file['fields']:
+            return ('id',)
+        return tuple(
+            f'{foreign_key_field}_id'
+            for foreign_key_field in data_file['foreign_keys']
+        )
+
+    def get_update_fields(self, model, data_file, key_fields):
+        names = [
+            *data_file['fields'],
+            *(f'{field}_id' for field in data_file.get('foreign_keys', {}))
+        ]
+        fields = {}
+        for name in names:
+            field = model._meta.get_field(name)
+            if (
+                field.attname in key_fields
+                or getattr(field, 'auto_now', False)
+                or getattr(field, 'auto_now_add', False)
+            ):
+                continue
+            fields[field.attname] = field
+        return fields
+
+    def get_existing(self, model, key_fields, fields, batch):
+        first_key_values = {getattr(obj, key_fields[0]) for obj in batch}
+        return {
+            tuple(values[key] for key in key_fields): values
+            for values in model.objects.filter(**{
+                f'{key_fields[0]}__in': first_key_values
+            }).values(*key_fields, *fields)
+        }
+
+    def classify(self, data_file, batch):
+        model = data_file['model']
+        key_fields = self.get_key_fields(data_file)
+        fields = self.get_update_fields(model, data_file, key_fields)
+        existing = self.get_existing(model, key_fields, fields, batch)
+        new, changed, skipped = [], [], 0
+        for obj in batch:
+            key = tuple(
+                model._meta.get_field(key).to_python(getattr(obj, key))
+                for key in key_fields
+            )
+            current = existing.get(key)
+            if current is None:
+                new.append(obj)
+            elif self.upsert and any(
+                field.to_python(getattr(obj, name)) != current[name]
+                for name, field in fields.items()
+            ):
+                changed.append(obj)
+            else:
+                skipped += 1
+        return new, changed, skipped, list(fields)
+
+    def write_batch(self, data_file, batch):
+        model = data_file['model']
+        if not batch:
+            return 0, 0, 0
+        if not (self.upsert or self.dry_run):
+            inserted = self.insert_batch(model, batch)
+            self.collect_cache_scopes(data_file, batch, ())
+            return inserted, 0, len(batch) - inserted
+        new, changed, skipped, fields = self.classify(data_file, batch)
+        if self.dry_run:
+            if 'id' in data_file['fields']:
+                self.planned_ids.setdefault(model, set()).update(
+                    int(obj.pk) for obj in new)
+            return len(new), len(changed), skipped
+        if changed and hasattr(model, 'modified'):
+            # bulk_update не вызывает pre_save, поэтому auto_now-поле
+            # выставляется явно, иначе ETag отзыва не изменится.
+            modified = timezone.now()
+            for obj in changed:
+                obj.modified = modified
+            fields.append('modified')
+        with transaction.atomic():
+            inserted = self.insert_batch(model, new)
+            if changed:
+                model.objects.bulk_update(changed, fields)
+        self.collect_cache_scopes(data_file, new + changed, changed)
+        return inserted, len(changed), skipped + len(new) - inserted
+
+    def collect_cache_scopes(self, data_file, written, changed):
+        get_scopes = data_file.get('cache_scopes')
+        with self.scopes_lock:
+            if get_scopes is not None:
+                for obj in written:
+                    self.cache_scopes.update(get_scopes(obj))
+            if data_file['model'] is User:
+                self.changed_authors.update(obj.pk for obj in changed)
+
+    def insert_batch(self, model, batch):
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            return len(batch)
+        except IntegrityError:
+            pass
+        inserted = 0
+        for obj in batch:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([obj])
+            except IntegrityError as e:
+                self.stderr.write(
+                    f'Ошибка при загрузке в таблицу {model.__name__} '
+                    f'данных с id={obj.pk}: {e}'
+                )
+            else:
+                inserted += 1
+        return inserted
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.models import RECALCULATE_BATCH_SIZE, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитать рейтинг и гистограмму оценок всех произведений '
+        'за один проход по отзывам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECALCULATE_BATCH_SIZE,
+            help='Сколько произведений обновлять одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = Title.objects.recalculate_scores(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Оценки пересчитаны для {updated} произведений за '
+            f'{time.monotonic() - started:.2f} с.'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reviews.models import RevokedToken, User
+
+
+class Command(BaseCommand):
+    help = 'Отозвать токены пользователя или отдельный токен по jti'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            default=[],
+            help='Отозвать все выданные пользователю токены.'
+        )
+        parser.add_argument(
+            '--jti',
+            action='append',
+            default=[],
+            help='Отозвать токен с указанным идентификатором.'
+        )
+        parser.add_argument(
+            '--purge',
+            action='store_true',
+            help='Удалить записи об отозванных токенах с истёкшим сроком.'
+        )
+
+    def handle(self, *args, **options):
+        for username in options['user']:
+            try:
+                User.objects.get(username=username).revoke_tokens()
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {username} не найден.')
+            self.stdout.write(f'Токены пользователя {username} отозваны.')
+        for jti in options['jti']:
+            RevokedToken.revoke(jti)
+            self.stdout.write(f'Токен {jti} отозван.')
+        if options['purge']:
+            deleted, _ = RevokedToken.objects.filter(
+                expires_at__lte=timezone.now()).delete()
+            self.stdout.write(f'Удалено истёкших записей: {deleted}.')
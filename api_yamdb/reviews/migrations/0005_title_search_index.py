@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-18 03:10
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE reviews_title_fts '
+            'USING fts5(name, description, tokenize="unicode61")'
+        )
+    except OperationalError:
+        # SQLite собран без FTS5: поиск будет работать через icontains.
+        return
+    schema_editor.execute(
+        'INSERT INTO reviews_title_fts (rowid, name, description) '
+        'SELECT id, name, description FROM reviews_title'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS reviews_title_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 03:30
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_score_histogram'),
+    ]
+
+    # В Django 3.2 SQLite пересоздаёт таблицу с функциональным индексом
+    # некорректно, поэтому индекс по LOWER(email) снимается на время
+    # удаления поля.
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_email_lower_idx',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='confirmation_code',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 03:40
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_remove_user_confirmation_code'),
+    ]
+
+    # Индекс по LOWER(email) снимается на время пересоздания таблицы,
+    # как в 0008_remove_user_confirmation_code.
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_email_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия токенов'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
-from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Lower, NullIf
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
 
 from reviews.constants import (
     DESCRIPTION_LENGTH,
@@ -16,6 +19,9 @@ from reviews.constants import (
 from reviews.validators import validate_username, validate_year
 
 
+TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_active')
+
+
 class User(AbstractUser):
     class Role(models.TextChoices):
         USER = 'user', 'Пользователь'
@@ -43,16 +49,17 @@ class User(AbstractUser):
         ),
         validators=[validate_username],
     )
-    confirmation_code = models.CharField(
-        'Код подтверждения',
-        default=settings.DEFAULT_CONFIRMATION_CODE,
-        max_length=settings.CONFIRMATION_CODE_MAX_LENGTH,
+    token_version = models.PositiveIntegerField(
+        'Версия токенов', default=0, editable=False
     )
 
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('username',)
+        indexes = (
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        )
 
     def __str__(self):
         return self.username[:DESCRIPTION_LENGTH]
@@ -67,6 +74,58 @@ class User(AbstractUser):
     def is_moderator(self):
         return self.role == self.Role.MODERATOR
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._loaded_claims = user.get_token_claims()
+        return user
+
+    def get_token_claims(self):
+        return tuple(
+            self.__dict__.get(field) for field in TOKEN_CLAIM_FIELDS
+        )
+
+    def save(self, *args, **kwargs):
+        # Изменение данных, записанных в токен, делает выданные токены
+        # недействительными: их версия перестаёт совпадать с token_version.
+        claims = self.get_token_claims()
+        if (
+            not self._state.adding
+            and getattr(self, '_loaded_claims', claims) != claims
+        ):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'token_version'
+                }
+        super().save(*args, **kwargs)
+        self._loaded_claims = claims
+
+    def revoke_tokens(self):
+        self.token_version += 1
+        self.save(update_fields=('token_version',))
+
+
+class RevokedToken(models.Model):
+    jti = models.CharField(
+        'Идентификатор токена', max_length=255, unique=True
+    )
+    expires_at = models.DateTimeField('Истекает', db_index=True)
+
+    class Meta:
+        verbose_name = 'отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+
+    def __str__(self):
+        return self.jti
+
+    @classmethod
+    def revoke(cls, jti):
+        # Запись хранится, пока токен с таким jti может быть действителен.
+        return cls.objects.update_or_create(jti=jti, defaults={
+            'expires_at': timezone.now() + api_settings.ACCESS_TOKEN_LIFETIME
+        })[0]
+
 
 class BaseNameSlugModel(models.Model):
     name = models.CharField('Название', max_length=NAME_MAX_LENGTH)
@@ -95,6 +154,81 @@ class Genre(BaseNameSlugModel):
         verbose_name_plural = 'Жанры'
 
 
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+HISTOGRAM_FIELDS = tuple(f'score_{score}' for score in SCORES)
+SCORE_FIELDS = ('score_sum', 'score_count', 'rating', *HISTOGRAM_FIELDS)
+RECALCULATE_BATCH_SIZE = 1000
+
+
+class TitleQuerySet(models.QuerySet):
+    def add_scores(self, added=None, removed=None):
+        score_sum = F('score_sum') + (added or 0) - (removed or 0)
+        score_count = (
+            F('score_count') + int(added is not None)
+            - int(removed is not None)
+        )
+        histogram = {}
+        if added != removed:
+            if added is not None:
+                histogram[f'score_{added}'] = F(f'score_{added}') + 1
+            if removed is not None:
+                histogram[f'score_{removed}'] = F(f'score_{removed}') - 1
+        return self.update(
+            score_sum=score_sum,
+            score_count=score_count,
+            rating=models.ExpressionWrapper(
+                score_sum / NullIf(score_count, 0),
+                output_field=models.PositiveSmallIntegerField()
+            ),
+            modified=timezone.now(),
+            **histogram,
+        )
+
+    def recalculate_scores(self, batch_size=RECALCULATE_BATCH_SIZE):
+        # Один проход по reviews_review: GROUP BY (title_id, score),
+        # упорядоченный по title_id, сливается с потоком произведений,
+        # а счётчики записываются пачками через bulk_update().
+        groups = Review.objects.filter(title__in=self).order_by(
+            'title_id', 'score'
+        ).values_list('title_id', 'score').annotate(
+            total=Count('id')
+        ).iterator()
+        group = next(groups, None)
+        modified = timezone.now()
+        batch = []
+        updated = 0
+        with transaction.atomic():
+            for title_id in self.order_by('pk').values_list(
+                'pk', flat=True
+            ).iterator():
+                title = self.model(
+                    pk=title_id, score_sum=0, score_count=0,
+                    modified=modified, **dict.fromkeys(HISTOGRAM_FIELDS, 0)
+                )
+                while group is not None and group[0] <= title_id:
+                    if group[0] == title_id:
+                        _, score, total = group
+                        setattr(title, f'score_{score}', total)
+                        title.score_sum += score * total
+                        title.score_count += total
+                    group = next(groups, None)
+                title.rating = (
+                    title.score_sum // title.score_count
+                    if title.score_count else None
+                )
+                batch.append(title)
+                if len(batch) >= batch_size:
+                    updated += self.flush_scores(batch)
+            updated += self.flush_scores(batch)
+        return updated
+
+    def flush_scores(self, batch):
+        self.model.objects.bulk_update(batch, (*SCORE_FIELDS, 'modified'))
+        flushed = len(batch)
+        batch.clear()
+        return flushed
+
+
 class Title(models.Model):
     name = models.CharField('Название', max_length=NAME_MAX_LENGTH)
     year = models.PositiveIntegerField(
@@ -109,6 +243,49 @@ class Title(models.Model):
         Category, on_delete=models.SET_NULL,
         null=True, verbose_name='Категория'
     )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    score_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    rating = models.PositiveSmallIntegerField(
+        'Рейтинг', null=True, default=None, editable=False
+    )
+    # Гистограмма оценок: по счётчику на каждое значение из SCORES.
+    score_1 = models.PositiveIntegerField(
+        'Количество оценок 1', default=0, editable=False
+    )
+    score_2 = models.PositiveIntegerField(
+        'Количество оценок 2', default=0, editable=False
+    )
+    score_3 = models.PositiveIntegerField(
+        'Количество оценок 3', default=0, editable=False
+    )
+    score_4 = models.PositiveIntegerField(
+        'Количество оценок 4', default=0, editable=False
+    )
+    score_5 = models.PositiveIntegerField(
+        'Количество оценок 5', default=0, editable=False
+    )
+    score_6 = models.PositiveIntegerField(
+        'Количество оценок 6', default=0, editable=False
+    )
+    score_7 = models.PositiveIntegerField(
+        'Количество оценок 7', default=0, editable=False
+    )
+    score_8 = models.PositiveIntegerField(
+        'Количество оценок 8', default=0, editable=False
+    )
+    score_9 = models.PositiveIntegerField(
+        'Количество оценок 9', default=0, editable=False
+    )
+    score_10 = models.PositiveIntegerField(
+        'Количество оценок 10', default=0, editable=False
+    )
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('-year', 'name')
@@ -119,6 +296,23 @@ class Title(models.Model):
     def __str__(self):
         return self.name[:DESCRIPTION_LENGTH]
 
+    def save(self, *args, **kwargs):
+        # Рейтинг меняется только через TitleQuerySet.add_scores(), поэтому
+        # при обновлении произведения его поля не перезаписываются.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in SCORE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def histogram(self):
+        return {
+            score: getattr(self, field)
+            for score, field in zip(SCORES, HISTOGRAM_FIELDS)
+        }
+
 
 class BaseContentModel(models.Model):
     text = models.TextField('Текст')
@@ -151,10 +345,17 @@ class Review(BaseContentModel):
         Title, on_delete=models.CASCADE,
         verbose_name='Произведение',
     )
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta(BaseContentModel.Meta):
         verbose_name = 'отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            )
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -165,6 +366,38 @@ class Review(BaseContentModel):
     def __str__(self):
         return f'Отзыв от {self.author} на {self.title}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        review = super().from_db(db, field_names, values)
+        review._loaded_score = (
+            review.__dict__.get('title_id'), review.__dict__.get('score')
+        )
+        return review
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            if not adding and None in getattr(
+                self, '_loaded_score', (None, None)
+            ):
+                self._loaded_score = Review.objects.values_list(
+                    'title_id', 'score'
+                ).get(pk=self.pk)
+            super().save(*args, **kwargs)
+            if adding:
+                Title.objects.filter(pk=self.title_id).add_scores(
+                    added=self.score)
+            elif self._loaded_score[0] != self.title_id:
+                old_title_id, old_score = self._loaded_score
+                Title.objects.filter(pk=old_title_id).add_scores(
+                    removed=old_score)
+                Title.objects.filter(pk=self.title_id).add_scores(
+                    added=self.score)
+            else:
+                Title.objects.filter(pk=self.title_id).add_scores(
+                    added=self.score, removed=self._loaded_score[1])
+        self._loaded_score = (self.title_id, self.score)
+
 
 class Comment(BaseContentModel):
     review = models.ForeignKey(
@@ -175,6 +408,12 @@ class Comment(BaseContentModel):
     class Meta(BaseContentModel.Meta):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            )
+        ]
 
     def __str__(self):
         return (f'{self.author} '
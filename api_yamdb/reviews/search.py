@@ -0,0 +1,70 @@
+import re
+from functools import lru_cache
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'reviews_title_fts'
+
+
+@lru_cache(maxsize=None)
+def has_search_index(alias=DEFAULT_DB_ALIAS):
+    connection = connections[alias]
+    return (
+        connection.vendor == 'sqlite'
+        and FTS_TABLE in connection.introspection.table_names()
+    )
+
+
+def index_title(title, alias=DEFAULT_DB_ALIAS):
+    if not has_search_index(alias):
+        return
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [title.pk, title.name, title.description]
+        )
+
+
+def unindex_title(title_id, alias=DEFAULT_DB_ALIAS):
+    if not has_search_index(alias):
+        return
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title_id])
+
+
+def rebuild_search_index(alias=DEFAULT_DB_ALIAS):
+    if not has_search_index(alias):
+        return
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'SELECT id, name, description FROM reviews_title'
+        )
+
+
+def get_match_query(query):
+    # Каждое слово ищется как префикс; кавычки экранируют синтаксис FTS5.
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def search_titles(queryset, query):
+    match = get_match_query(query)
+    if not match:
+        return queryset
+    if not has_search_index(queryset.db):
+        return queryset.filter(
+            Q(name__icontains=query) | Q(description__icontains=query)
+        )
+    db_table = queryset.model._meta.db_table
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,)
+    )).annotate(search_rank=RawSQL(
+        f'SELECT rank FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = {db_table}.id',
+        (match,)
+    )).order_by('search_rank', *queryset.model._meta.ordering, 'id')
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Review, Title
+from reviews.search import index_title, unindex_title
+
+
+@receiver(post_delete, sender=Review)
+def subtract_review_score(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).add_scores(
+        removed=instance.score)
+
+
+@receiver(post_save, sender=Title)
+def update_title_search_index(sender, instance, using, **kwargs):
+    index_title(instance, using)
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_search_index(sender, instance, using, **kwargs):
+    unindex_title(instance.pk, using)
@@ -0,0 +1,48 @@
+import shutil
+import tempfile
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache, caches
+
+from api.authentication import verified_tokens
+from api.autocomplete import title_index
+from api.revocation import revoked_tokens
+
+
+def file_cache_aliases():
+    return [
+        alias for alias, config in settings.CACHES.items()
+        if config['BACKEND'].endswith('FileBasedCache')
+    ]
+
+
+def pytest_configure(config):
+    # Файловые кэши переносятся во временный каталог до первого обращения
+    # к ним, чтобы тесты не трогали каталог кэша в исходниках проекта.
+    config.cache_dir = tempfile.mkdtemp(prefix='yamdb-cache-')
+    settings.CACHES = {
+        alias: (
+            {**cache_config, 'LOCATION': f'{config.cache_dir}/{alias}'}
+            if alias in file_cache_aliases() else cache_config
+        )
+        for alias, cache_config in settings.CACHES.items()
+    }
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(config.cache_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    for alias in file_cache_aliases():
+        caches[alias].clear()
+    verified_tokens.clear()
+    revoked_tokens.clear()
+    yield
+    # Фоновые потоки индекса автодополнения не должны пережить тест.
+    title_index.join()
+    cache.clear()
+    verified_tokens.clear()
@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def sync_mail_queue(settings):
+    settings.EMAIL_QUEUE_ASYNC = False
@@ -2,6 +2,8 @@ import pytest
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import AccessToken
 
+from api.authentication import RoleAccessToken
+
 
 @pytest.fixture
 def user_superuser(django_user_model):
@@ -109,3 +111,25 @@ def user_client(token_user):
     client = APIClient()
     client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}')
     return client
+
+
+@pytest.fixture
+def role_client():
+    # Клиент с токеном, содержащим claims роли (RoleAccessToken).
+    def make_client(user=None, token=None):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=(
+            f'Bearer {token or RoleAccessToken.for_user(user)}'
+        ))
+        return client
+    return make_client
+
+
+@pytest.fixture
+def role_user_client(role_client, user):
+    return role_client(user)
+
+
+@pytest.fixture
+def role_admin_client(role_client, admin):
+    return role_client(admin)
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, client, admin_client,
+                                              admin, user_client, user,
+                                              moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзыва.'
+        )
+
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[1]['id']
+            ),
+            data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки в отзыве.'
+        )
+
+        response = moderator_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 6, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+        user.delete()
+        moderator.delete()
+        assert self.get_rating(client, title_id) is None, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'каскадном удалении отзывов вместе с автором.'
+        )
+
+    def test_02_recalculate_scores(self, admin_client, admin, user_client,
+                                   user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.update(score_sum=0, score_count=0, rating=None)
+        Title.objects.recalculate_scores()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.score_count, title.rating) == (
+            10, 2, 5
+        ), (
+            'Проверьте, что `recalculate_scores()` восстанавливает рейтинг '
+            'по таблице отзывов.'
+        )
+
+    def test_03_stale_title_save_keeps_rating(self, admin_client, admin,
+                                              user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        stale = Title.objects.get(pk=titles[0]['id'])
+        Review.objects.filter(title=stale).delete()
+        stale.name = 'Новое название'
+        stale.save()
+        title = Title.objects.get(pk=stale.pk)
+        assert (title.name, title.score_count, title.rating) == (
+            'Новое название', 0, None
+        ), (
+            'Проверьте, что сохранение устаревшего экземпляра произведения '
+            'не перезаписывает его рейтинг.'
+        )
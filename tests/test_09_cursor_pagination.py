@@ -0,0 +1,151 @@
+import json
+from base64 import b64encode
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+import pytest
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleCursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def create_titles(self, count):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        for number in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {number % 4}',
+                year=1990 + number % 3,
+                category=category if number % 2 else None,
+            )
+            if number % 2:
+                title.genre.add(genre)
+
+    def walk(self, client, url, link='next'):
+        ids, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` с курсором возвращает '
+                'ответ со статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме не выполняется подсчёт '
+                'общего количества объектов.'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            url, pages = data[link], pages + 1
+        return ids, pages
+
+    def test_01_cursor_walks_whole_catalog(self, client):
+        self.create_titles(25)
+        expected = list(Title.objects.order_by(
+            '-year', 'name', 'id').values_list('id', flat=True))
+        ids, pages = self.walk(client, f'{self.TITLES_URL}?pagination=cursor')
+        assert ids == expected and pages == 3, (
+            f'Проверьте, что курсорная пагинация `{self.TITLES_URL}` '
+            'возвращает все произведения ровно один раз в порядке '
+            '(-year, name, id).'
+        )
+
+        response = client.get(f'{self.TITLES_URL}?pagination=cursor')
+        next_url = response.json()['next']
+        response = client.get(client.get(next_url).json()['previous'])
+        assert [item['id'] for item in response.json()['results']] == (
+            expected[:10]
+        ), 'Проверьте, что ссылка `previous` возвращает предыдущую страницу.'
+
+    def test_02_cursor_keeps_filters(self, client):
+        self.create_titles(25)
+        expected = list(Title.objects.filter(
+            genre__slug='drama'
+        ).order_by('-year', 'name', 'id').values_list('id', flat=True))
+        ids, _ = self.walk(
+            client, f'{self.TITLES_URL}?pagination=cursor&genre=drama'
+        )
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация учитывает фильтры '
+            f'`{self.TITLES_URL}`.'
+        )
+
+    def test_03_invalid_cursor(self, client):
+        response = client.get(f'{self.TITLES_URL}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что некорректный курсор возвращает ответ со '
+            'статусом 404.'
+        )
+
+    @pytest.mark.parametrize('position', (
+        ['abc', 'x', 1], [{}, 'x', 1], [1990, 'x', None], [1990, 'x'],
+    ))
+    def test_04_tampered_cursor(self, client, position):
+        self.create_titles(3)
+        cursor = b64encode(
+            urlencode({'p': json.dumps(position)}).encode()).decode()
+        response = client.get(self.TITLES_URL, {'cursor': cursor})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор с подменёнными значениями позиции '
+            'возвращает ответ со статусом 404.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09ReviewCursorPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            ids.extend(item['id'] for item in response.json()['results'])
+            url = response.json()['next']
+        return ids
+
+    def test_01_cursor_walks_reviews_and_comments(self, client,
+                                                  django_user_model):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@yamdb.fake'
+            )
+            for number in range(12)
+        ]
+        for author in authors:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        review = Review.objects.first()
+        for author in authors:
+            Comment.objects.create(
+                review=review, author=author, text='Комментарий'
+            )
+
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        assert self.walk(client, f'{url}?pagination=cursor') == list(
+            title.reviews.order_by('-pub_date', '-id').values_list(
+                'id', flat=True)
+        ), (
+            f'Проверьте, что курсорная пагинация `{self.REVIEWS_URL_TEMPLATE}`'
+            ' возвращает все отзывы в порядке (-pub_date, -id).'
+        )
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=title.id, review_id=review.id)
+        assert self.walk(client, f'{url}?pagination=cursor') == list(
+            review.comments.order_by('-pub_date', '-id').values_list(
+                'id', flat=True)
+        ), (
+            'Проверьте, что курсорная пагинация '
+            f'`{self.COMMENTS_URL_TEMPLATE}` возвращает все комментарии в '
+            'порядке (-pub_date, -id).'
+        )
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def catalog():
+    categories = [
+        Category.objects.create(name=f'Категория {number}', slug=f'c{number}')
+        for number in range(3)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {number}', slug=f'g{number}')
+        for number in range(3)
+    ]
+    titles = []
+    for number in range(15):
+        title = Title.objects.create(
+            name=f'Произведение {number}',
+            year=2000 + number,
+            category=categories[number % 3],
+        )
+        title.genre.set(genres[:number % 3 + 1])
+        titles.append(title)
+    return titles
+
+
+@pytest.fixture
+def feed(catalog, django_user_model):
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake'
+        )
+        for number in range(10)
+    ]
+    reviews = [
+        Review.objects.create(
+            title=catalog[0], author=author, text='Отзыв', score=5
+        )
+        for author in authors
+    ]
+    for author in authors:
+        Comment.objects.create(
+            review=reviews[0], author=author, text='Комментарий'
+        )
+    return catalog[0], reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10QueryCount:
+
+    @pytest.mark.parametrize('url, max_queries', (
+        ('/api/v1/titles/', 3),
+        ('/api/v1/titles/?pagination=cursor', 2),
+        ('/api/v1/titles/?genre=g0&category=c1', 3),
+        ('/api/v1/titles/{title_id}/', 3),
+    ))
+    def test_01_titles_query_budget(self, client, catalog,
+                                    django_assert_max_num_queries,
+                                    url, max_queries):
+        url = url.format(title_id=catalog[0].id)
+        with django_assert_max_num_queries(max_queries):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+
+    @pytest.mark.parametrize('url, max_queries', (
+        ('/api/v1/titles/{title_id}/reviews/', 4),
+        ('/api/v1/titles/{title_id}/reviews/{review_id}/', 3),
+        ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/', 3),
+    ))
+    def test_02_feeds_query_budget(self, client, feed,
+                                   django_assert_max_num_queries,
+                                   url, max_queries):
+        title, reviews = feed
+        url = url.format(title_id=title.id, review_id=reviews[0].id)
+        with django_assert_max_num_queries(max_queries):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+
+    def test_03_review_patch_query_budget(self, feed, user_client, user,
+                                          django_assert_max_num_queries):
+        title, _ = feed
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        with django_assert_max_num_queries(6):
+            response = user_client.patch(url, data={'score': 7})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что автор может изменить отзыв через `{url}`.'
+        )
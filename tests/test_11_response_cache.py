@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+
+from api.cache import get_versions
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.fixture(params=('locmem', 'file'))
+def cache_backend(request, settings, tmp_path):
+    if request.param == 'file':
+        settings.CACHES = {
+            **settings.CACHES,
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': str(tmp_path),
+            }
+        }
+    return request.param
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_anonymous_get_is_cached(self, client, cache_backend,
+                                        django_assert_num_queries):
+        Title.objects.create(name='Терминатор', year=1984)
+        response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        with django_assert_num_queries(0):
+            cached = client.get(self.TITLES_URL)
+        assert cached.json() == response.json(), (
+            f'Проверьте, что повторный GET-запрос к `{self.TITLES_URL}` '
+            'возвращает закэшированный ответ без обращения к БД.'
+        )
+
+    def test_02_model_changes_bump_versions(self, client, cache_backend,
+                                            user, django_assert_num_queries,
+                                            django_assert_max_num_queries):
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(
+            name='Терминатор', year=1984, category=category)
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        client.get(self.TITLES_URL)
+        client.get(reviews_url)
+
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=8)
+        assert client.get(self.TITLES_URL).json()['results'][0][
+            'rating'] == 8, (
+            'Проверьте, что создание отзыва сбрасывает кэш списка '
+            'произведений.'
+        )
+        assert client.get(reviews_url).json()['count'] == 1, (
+            'Проверьте, что создание отзыва сбрасывает кэш списка отзывов.'
+        )
+
+        Comment.objects.create(review=review, author=user, text='Текст')
+        with django_assert_num_queries(0):
+            client.get(self.TITLES_URL)
+        with django_assert_max_num_queries(1):
+            client.get(reviews_url)
+
+        category.name = 'Кино'
+        category.save()
+        assert client.get(self.TITLES_URL).json()['results'][0][
+            'category']['name'] == 'Кино', (
+            'Проверьте, что изменение категории сбрасывает кэш списка '
+            'произведений.'
+        )
+
+    def test_03_authenticated_get_is_not_cached(self, user_client):
+        Title.objects.create(name='Терминатор', year=1984)
+        user_client.get(self.TITLES_URL)
+        Title.objects.update(name='Крепкий орешек')
+        response = user_client.get(self.TITLES_URL)
+        assert response.json()['results'][0]['name'] == 'Крепкий орешек', (
+            'Проверьте, что ответы авторизованным пользователям не '
+            'кэшируются.'
+        )
+
+    def test_04_author_rename_bumps_feeds(self, client, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=8)
+        Comment.objects.create(review=review, author=user, text='Текст')
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        client.get(reviews_url)
+        client.get(comments_url)
+        user.username = 'Renamed'
+        user.save()
+        for url in (reviews_url, comments_url):
+            assert client.get(url).json()['results'][0][
+                'author'] == 'Renamed', (
+                'Проверьте, что переименование автора сбрасывает кэш лент '
+                'отзывов и комментариев.'
+            )
+
+    def test_05_versions_bumped_after_commit(self, client, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        scope = f'reviews:{title.id}'
+        version = get_versions((scope,))
+        with transaction.atomic():
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=8)
+            assert get_versions((scope,)) == version, (
+                'Проверьте, что версии кэша меняются только после '
+                'фиксации транзакции.'
+            )
+        assert get_versions((scope,)) != version
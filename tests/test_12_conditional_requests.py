@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalRequests:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def test_01_if_none_match(self, client, user,
+                              django_assert_max_num_queries):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        for url in (
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.id),
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id),
+        ):
+            response = client.get(url)
+            etag = response.get('ETag')
+            assert etag and response.get('Last-Modified'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовки `ETag` и `Last-Modified`.'
+            )
+            with django_assert_max_num_queries(1):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` возвращает ответ со статусом 304.'
+            )
+
+            Review.objects.filter(title=title, author=user).delete()
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=7)
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после нового отзыва `ETag` для `{url}` '
+                'меняется.'
+            )
+
+    def test_02_if_match(self, admin_client, user_client, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=7)
+        for client, url, data in (
+            (
+                admin_client,
+                self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.id),
+                {'name': 'Терминатор 2'}
+            ),
+            (
+                user_client,
+                self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                    title_id=title.id, review_id=review.id),
+                {'score': 9}
+            ),
+        ):
+            etag = client.get(url)['ETag']
+            response = client.patch(url, data=data, HTTP_IF_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что PATCH-запрос к `{url}` с актуальным '
+                '`If-Match` выполняется.'
+            )
+            response = client.patch(url, data=data, HTTP_IF_MATCH=etag)
+            assert response.status_code == HTTPStatus.PRECONDITION_FAILED, (
+                f'Проверьте, что PATCH-запрос к `{url}` с устаревшим '
+                '`If-Match` возвращает ответ со статусом 412.'
+            )
+
+    def test_03_author_rename_changes_etag(self, client, user):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=7)
+        urls = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id),
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title.id, review_id=review.id),
+        )
+        etags = [client.get(url)['ETag'] for url in urls]
+        user.username = 'Renamed'
+        user.save()
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после переименования автора `ETag` для '
+                f'`{url}` меняется.'
+            )
+            assert 'Renamed' in response.content.decode()
+
+    def test_04_genre_change_changes_title_etag(self, client):
+        title = Title.objects.create(name='Терминатор', year=1984)
+        genre = Genre.objects.create(name='Боевик', slug='action')
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.id)
+        etag = client.get(url)['ETag']
+        title.genre.add(genre)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения жанров произведения его `ETag` '
+            'меняется.'
+        )
+        assert response.json()['genre'][0]['slug'] == 'action'
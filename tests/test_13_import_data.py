@@ -0,0 +1,196 @@
+import csv
+import json
+from concurrent.futures import Future
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.cache import get_versions
+from reviews.management.commands.import_data import (
+    Command, data_files, get_load_levels)
+from reviews.models import Comment, Review, Title, User
+from tests.conftest import MANAGE_PATH
+
+
+@pytest.fixture
+def data_dir(monkeypatch):
+    monkeypatch.chdir(MANAGE_PATH)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ImportData:
+
+    def get_state(self):
+        return (
+            Title.objects.count(),
+            Title.genre.through.objects.count(),
+            User.objects.count(),
+            list(Review.objects.order_by('id').values_list('id', 'score')),
+            Comment.objects.count(),
+            list(Title.objects.order_by('id').values_list('id', 'rating')),
+        )
+
+    def test_01_bulk_matches_row_by_row(self, data_dir):
+        call_command('import_data', stdout=StringIO())
+        expected = self.get_state()
+        for model in (Comment, Review, Title, User):
+            model.objects.all().delete()
+
+        out = StringIO()
+        call_command(
+            'import_data', '--bulk', '--batch-size=7', '--progress-every=50',
+            stdout=out, stderr=StringIO()
+        )
+        assert self.get_state() == expected, (
+            'Проверьте, что `import_data --bulk` загружает те же данные, '
+            'что и построчная загрузка, и пересчитывает рейтинги.'
+        )
+        assert 'Review: обработано 50 строк.' in out.getvalue(), (
+            'Проверьте, что `import_data --bulk` сообщает о прогрессе.'
+        )
+
+    def test_02_parallel_matches_row_by_row(self, data_dir):
+        assert [
+            {data_file['model'].__name__ for data_file in level}
+            for level in get_load_levels(data_files)
+        ] == [
+            {'Category', 'Genre', 'User'},
+            {'Title'},
+            {'Review', 'Title_genre'},
+            {'Comment'},
+        ], (
+            'Проверьте, что порядок загрузки таблиц строится по внешним '
+            'ключам.'
+        )
+        call_command('import_data', stdout=StringIO())
+        expected = self.get_state()
+        for model in (Comment, Review, Title, User):
+            model.objects.all().delete()
+
+        out = StringIO()
+        call_command(
+            'import_data', '--parallel', '--workers=2',
+            stdout=out, stderr=StringIO()
+        )
+        assert self.get_state() == expected, (
+            'Проверьте, что `import_data --parallel` загружает те же данные, '
+            'что и построчная загрузка.'
+        )
+        assert 'Таблица Comment загружена за' in out.getvalue(), (
+            'Проверьте, что `import_data --parallel` сообщает время загрузки '
+            'каждой таблицы.'
+        )
+
+    def test_03_bulk_reports_broken_rows(self, data_dir):
+        call_command('import_data', '--bulk', stdout=StringIO(),
+                     stderr=StringIO())
+        err = StringIO()
+        call_command('import_data', '--bulk', stdout=StringIO(), stderr=err)
+        assert 'Ошибка при загрузке в таблицу Category' in err.getvalue(), (
+            'Проверьте, что `import_data --bulk` сообщает о строках, '
+            'которые не удалось загрузить.'
+        )
+
+    def test_04_dry_run_writes_nothing(self, data_dir):
+        out = StringIO()
+        call_command('import_data', '--dry-run', stdout=out, stderr=StringIO())
+        assert not Title.objects.exists() and not Review.objects.exists(), (
+            'Проверьте, что `import_data --dry-run` ничего не записывает в БД.'
+        )
+        assert (
+            'Пробный запуск: таблица Comment: добавлено 3, обновлено 0, '
+            'пропущено 0, ошибок 0.'
+        ) in out.getvalue(), (
+            'Проверьте, что `import_data --dry-run` считает добавляемые '
+            'строки с учётом ещё не загруженных родительских таблиц.'
+        )
+
+    def test_05_upsert(self, data_dir):
+        call_command('import_data', '--bulk', stdout=StringIO())
+        review = Review.objects.order_by('id').first()
+        Review.objects.filter(pk=review.pk).update(score=1, text='Изменено')
+        Comment.objects.order_by('id').first().delete()
+
+        out, err = StringIO(), StringIO()
+        call_command('import_data', '--upsert', stdout=out, stderr=err)
+        assert not err.getvalue(), (
+            'Проверьте, что повторный запуск `import_data --upsert` не '
+            'выводит ошибок о дубликатах.'
+        )
+        assert 'таблица Review: добавлено 0, обновлено 1' in out.getvalue()
+        assert 'таблица Comment: добавлено 1, обновлено 0' in out.getvalue()
+        review.refresh_from_db()
+        title = review.title
+        title.refresh_from_db()
+        assert review.score != 1 and review.text != 'Изменено', (
+            'Проверьте, что `import_data --upsert` обновляет существующие '
+            'записи по первичному ключу.'
+        )
+        assert title.rating == title.score_sum // title.score_count
+
+    def test_06_resume_from_checkpoint(self, data_dir, tmp_path):
+        checkpoint = tmp_path / 'checkpoint.json'
+        checkpoint.write_text(json.dumps({'static/data/review.csv': 50}))
+        with open('static/data/review.csv', encoding='utf-8') as file:
+            total = len(list(csv.DictReader(file)))
+
+        call_command(
+            'import_data', f'--checkpoint={checkpoint}',
+            stdout=StringIO(), stderr=StringIO()
+        )
+        assert Review.objects.count() == total - 50, (
+            'Проверьте, что `import_data --checkpoint` продолжает загрузку '
+            'со строки, сохранённой в контрольной точке.'
+        )
+        assert not checkpoint.exists(), (
+            'Проверьте, что после успешной загрузки контрольная точка '
+            'удаляется.'
+        )
+
+    def test_07_parallel_parses_in_chunks(self, data_dir):
+        class Parsers:
+            submitted = 0
+
+            def submit(self, function, rows, *args):
+                self.submitted += len(rows)
+                future = Future()
+                future.set_result(function(rows, *args))
+                return future
+
+        parsers = Parsers()
+        review_file = next(
+            data_file for data_file in data_files
+            if data_file['model'] is Review
+        )
+        ahead = parsed = 0
+        for _ in Command().parse_chunks(review_file, parsers, 7, 2):
+            parsed += 1
+            ahead = max(ahead, parsers.submitted - parsed)
+        with open('static/data/review.csv', encoding='utf-8') as file:
+            assert parsed == len(list(csv.DictReader(file)))
+        assert ahead < 4 * 7, (
+            'Проверьте, что `import_data --parallel` разбирает CSV-файлы '
+            'кусками и не держит в памяти больше нескольких пакетов.'
+        )
+
+    def test_08_upsert_invalidates_caches(self, data_dir, client):
+        call_command('import_data', '--bulk', stdout=StringIO())
+        review = Review.objects.order_by('id').first()
+        Review.objects.filter(pk=review.pk).update(score=1, text='Изменено')
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+        assert client.get(url).json()['text'] == 'Изменено'
+        scopes = (f'reviews:{review.title_id}', f'title:{review.title_id}')
+        versions = get_versions(scopes)
+
+        call_command(
+            'import_data', '--upsert', stdout=StringIO(), stderr=StringIO())
+        assert get_versions(scopes) != versions, (
+            'Проверьте, что `import_data --upsert` сбрасывает версии кэша '
+            'затронутых лент.'
+        )
+        assert client.get(url).json()['text'] != 'Изменено'
+        assert Review.objects.get(pk=review.pk).modified > review.modified, (
+            'Проверьте, что `import_data --upsert` обновляет поле '
+            '`modified` изменённых отзывов.'
+        )
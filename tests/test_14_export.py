@@ -0,0 +1,68 @@
+import csv
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Review, Title
+from tests.conftest import MANAGE_PATH
+
+
+@pytest.fixture
+def imported_data(monkeypatch):
+    monkeypatch.chdir(MANAGE_PATH)
+    call_command('import_data', '--bulk', stdout=StringIO())
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Export:
+
+    EXPORT_URL_TEMPLATE = '/api/v1/export/{table}/'
+
+    def test_01_export_command(self, imported_data, tmp_path):
+        call_command(
+            'export_data', '--format=ndjson', f'--output-dir={tmp_path}',
+            '--chunk-size=7', stdout=StringIO()
+        )
+        with open(tmp_path / 'titles.ndjson', encoding='utf-8') as file:
+            titles = [json.loads(line) for line in file]
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert len(titles) == Title.objects.count(), (
+            'Проверьте, что `export_data` выгружает все произведения.'
+        )
+        assert titles[0]['genre'] == sorted(
+            title.genre.values_list('slug', flat=True)
+        ) and titles[0]['rating'] == title.rating, (
+            'Проверьте, что `export_data` выгружает жанры, категорию и '
+            'рейтинг произведения.'
+        )
+
+        call_command(
+            'export_data', 'reviews', 'comments', f'--output-dir={tmp_path}',
+            stdout=StringIO()
+        )
+        for model, table in ((Review, 'reviews'), (Comment, 'comments')):
+            with open(tmp_path / f'{table}.csv', encoding='utf-8') as file:
+                assert len(list(csv.DictReader(file))) == (
+                    model.objects.count()
+                ), f'Проверьте, что `export_data` выгружает все {table}.'
+
+    def test_02_export_endpoint(self, imported_data, client, user_client,
+                                admin_client):
+        url = self.EXPORT_URL_TEMPLATE.format(table='titles')
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что `{url}` доступен только администратору.'
+        )
+        response = admin_client.get(f'{url}?output=ndjson')
+        assert response.status_code == HTTPStatus.OK and response.streaming, (
+            f'Проверьте, что `{url}` отдаёт выгрузку потоком.'
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert len(lines) == Title.objects.count()
+
+        response = admin_client.get(
+            self.EXPORT_URL_TEMPLATE.format(table='users'))
+        assert response.status_code == HTTPStatus.NOT_FOUND
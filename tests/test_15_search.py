@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews import search
+from reviews.models import Title
+
+
+@pytest.fixture
+def titles():
+    return [
+        Title.objects.create(
+            name='Побег из Шоушенка', year=1994,
+            description='Тюремная драма о надежде.'
+        ),
+        Title.objects.create(
+            name='Шоу Трумана', year=1998,
+            description='Жизнь в прямом эфире.'
+        ),
+        Title.objects.create(
+            name='Крёстный отец', year=1972,
+            description='Побег от семейного прошлого не удался.'
+        ),
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`search` возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_uses_fts(self, client, titles):
+        assert search.has_search_index(), (
+            'Проверьте, что для SQLite создаётся таблица полнотекстового '
+            'поиска FTS5.'
+        )
+        assert self.search(client, 'побег') == [
+            'Побег из Шоушенка', 'Крёстный отец'
+        ], (
+            'Проверьте, что поиск идёт по названию и описанию, а '
+            'совпадения в названии ранжируются выше.'
+        )
+        assert self.search(client, 'шоу') == [
+            'Шоу Трумана', 'Побег из Шоушенка'
+        ], 'Проверьте, что поиск находит слова по префиксу.'
+        assert self.search(client, '"OR (') == [], (
+            'Проверьте, что синтаксис FTS5 в запросе экранируется.'
+        )
+
+    def test_02_index_follows_changes(self, client, titles):
+        titles[1].name = 'Бегущий по лезвию'
+        titles[1].save()
+        titles[0].delete()
+        assert self.search(client, 'шоу') == [], (
+            'Проверьте, что индекс поиска обновляется при изменении и '
+            'удалении произведений.'
+        )
+        assert self.search(client, 'лезвию') == ['Бегущий по лезвию']
+
+    def test_03_fallback_without_fts(self, client, titles, monkeypatch):
+        monkeypatch.setattr(search, 'has_search_index', lambda alias: False)
+        assert set(self.search(client, 'Побег')) == {
+            'Побег из Шоушенка', 'Крёстный отец'
+        }, (
+            'Проверьте, что без FTS5 поиск выполняется по вхождению '
+            'подстроки.'
+        )
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.autocomplete import TitleAutocompleteIndex, title_index
+from reviews.models import Review, Title
+
+
+@pytest.fixture
+def titles():
+    title_index.built_at = None
+    titles = [
+        Title.objects.create(name='Побег из Шоушенка', year=1994),
+        Title.objects.create(name='Шоу Трумана', year=1998),
+        Title.objects.create(name='Крёстный отец', year=1972),
+        Title.objects.create(name='Крепкий орешек', year=1988),
+    ]
+    title_index.build()
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Autocomplete:
+
+    AUTOCOMPLETE_URL = '/api/v1/titles/autocomplete/'
+
+    def names(self, client, query, **params):
+        response = client.get(self.AUTOCOMPLETE_URL, {'q': query, **params})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.AUTOCOMPLETE_URL}` '
+            'возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()]
+
+    def test_01_prefix_search(self, client, titles, user, admin,
+                              django_assert_num_queries):
+        for author in (user, admin):
+            Review.objects.create(
+                title=titles[3], author=author, text='Отзыв', score=9)
+        assert self.names(client, 'кр') == [
+            'Крепкий орешек', 'Крёстный отец'
+        ], (
+            'Проверьте, что автодополнение ищет по префиксу и сортирует '
+            'по рейтингу.'
+        )
+        with django_assert_num_queries(0):
+            assert self.names(client, 'шоу') == [
+                'Побег из Шоушенка', 'Шоу Трумана'
+            ], (
+                'Проверьте, что автодополнение ищет по началу любого слова '
+                'и не обращается к БД.'
+            )
+        assert self.names(client, 'крес', limit=1) == ['Крёстный отец']
+
+    def test_02_index_follows_changes(self, client, titles, user):
+        self.names(client, 'к')
+        titles[0].name = 'Криминальное чтиво'
+        titles[0].save()
+        titles[3].delete()
+        Review.objects.create(
+            title=titles[0], author=user, text='Отзыв', score=10)
+        title_index.join()
+        assert self.names(client, 'кр') == [
+            'Криминальное чтиво', 'Крёстный отец'
+        ], (
+            'Проверьте, что индекс автодополнения обновляется при изменении '
+            'произведений и отзывов.'
+        )
+
+    def test_03_index_builds_in_background(self, client, titles, monkeypatch,
+                                           django_assert_num_queries):
+        index = TitleAutocompleteIndex()
+        monkeypatch.setattr('api.views.title_index', index)
+        with django_assert_num_queries(0):
+            assert self.names(client, 'кр') == [], (
+                'Проверьте, что до сборки индекса автодополнение не '
+                'обращается к БД, а собирает индекс в фоне.'
+            )
+        index.thread.join()
+        assert self.names(client, 'кр') == ['Крепкий орешек', 'Крёстный отец']
+
+    def test_04_writes_do_not_query_index(self, titles, user):
+        counts = []
+        for built_at in (title_index.built_at, None):
+            title_index.built_at = built_at
+            with CaptureQueriesContext(connection) as queries:
+                Review.objects.create(
+                    title=titles[len(counts)], author=user, text='Отзыв',
+                    score=8
+                )
+            counts.append(len(queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что обновление индекса автодополнения не добавляет '
+            'запросов к БД в потоке запроса.'
+        )
+        title_index.join()
+        assert title_index.titles[titles[0].pk]['score_count'] == 1
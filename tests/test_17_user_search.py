@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.filters import UserSearchFilter
+from reviews.models import User
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17UserSearch:
+
+    USERS_URL = '/api/v1/users/'
+
+    def search(self, client, **params):
+        response = client.get(self.USERS_URL, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что поиск по `{self.USERS_URL}` возвращает ответ '
+            'со статусом 200.'
+        )
+        return (
+            [user['username'] for user in response.json()['results']],
+            response.get('X-Search-Strategy'),
+        )
+
+    def test_01_prefix_search(self, admin_client, user, moderator):
+        assert self.search(admin_client, search='TestMod') == (
+            ['TestModerator'], 'prefix'
+        ), (
+            'Проверьте, что поиск по умолчанию ищет по префиксу username и '
+            'сообщает стратегию в заголовке `X-Search-Strategy`.'
+        )
+        assert self.search(admin_client, search='Test')[0] == [
+            'TestAdmin', 'TestModerator', 'TestUser'
+        ]
+        assert self.search(admin_client, search='estUser')[0] == [], (
+            'Проверьте, что поиск по префиксу не находит совпадения '
+            'в середине username.'
+        )
+
+    def test_02_exact_and_contains(self, admin_client, user):
+        assert self.search(
+            admin_client, search='Test', search_mode='exact'
+        ) == ([], 'exact')
+        assert self.search(
+            admin_client, search='estUser', search_mode='contains'
+        ) == (['TestUser'], 'contains')
+        response = admin_client.get(
+            self.USERS_URL, {'search': 'Test', 'search_mode': 'fuzzy'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_email_search(self, admin_client, user):
+        assert self.search(admin_client, search='TestUser@YAMDB.fake') == (
+            ['TestUser'], 'email'
+        ), (
+            'Проверьте, что поиск по email не зависит от регистра.'
+        )
+
+    def test_04_no_search(self, admin_client):
+        response = admin_client.get(self.USERS_URL)
+        assert 'X-Search-Strategy' not in response
+
+    @pytest.mark.parametrize('strategy, value, index', (
+        ('prefix', 'Test', 'sqlite_autoindex'),
+        ('email', 'testuser@yamdb.fake', 'user_email_lower_idx'),
+    ))
+    def test_05_uses_index(self, rf, strategy, value, index):
+        request = rf.get('/', {'search': value, 'search_mode': strategy})
+        request.query_params = request.GET
+        queryset = UserSearchFilter().filter_queryset(
+            request, User.objects.all(), view=type('View', (), {})())
+        assert index in queryset.explain(), (
+            f'Проверьте, что стратегия `{strategy}` использует индекс.'
+        )
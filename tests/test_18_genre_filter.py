@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Genre, Title
+
+
+@pytest.fixture
+def titles():
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    crime = Genre.objects.create(name='Криминал', slug='crime')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    godfather = Title.objects.create(name='Крёстный отец', year=1972)
+    godfather.genre.set((drama, crime))
+    shawshank = Title.objects.create(name='Побег из Шоушенка', year=1994)
+    shawshank.genre.set((drama,))
+    truman = Title.objects.create(name='Шоу Трумана', year=1998)
+    truman.genre.set((drama, comedy))
+    return godfather, shawshank, truman
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18GenreFilter:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def names(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с фильтром по '
+            'жанрам возвращает ответ со статусом 200.'
+        )
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_any_genre(self, client, titles):
+        assert self.names(client, genre='crime,comedy') == [
+            'Крёстный отец', 'Шоу Трумана'
+        ], (
+            'Проверьте, что по умолчанию фильтр `genre` возвращает '
+            'произведения хотя бы с одним из перечисленных жанров.'
+        )
+        assert len(self.names(client, genre='drama')) == 3, (
+            'Проверьте, что фильтр по жанру не дублирует произведения.'
+        )
+
+    def test_02_all_genres(self, client, titles):
+        assert self.names(
+            client, genre='drama,crime', genre_mode='all'
+        ) == ['Крёстный отец'], (
+            'Проверьте, что `genre_mode=all` возвращает произведения со '
+            'всеми перечисленными жанрами.'
+        )
+        assert self.names(
+            client, genre='crime,comedy', genre_mode='all') == []
+
+    def test_03_invalid_mode(self, client, titles):
+        response = client.get(
+            self.TITLES_URL, {'genre': 'drama', 'genre_mode': 'none'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
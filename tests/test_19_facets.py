@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def titles():
+    film = Category.objects.create(name='Фильм', slug='film')
+    book = Category.objects.create(name='Книга', slug='book')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    crime = Genre.objects.create(name='Криминал', slug='crime')
+    godfather = Title.objects.create(
+        name='Крёстный отец', year=1972, category=film)
+    godfather.genre.set((drama, crime))
+    novel = Title.objects.create(
+        name='Крёстный отец', year=1969, category=book)
+    novel.genre.set((crime,))
+    shawshank = Title.objects.create(
+        name='Побег из Шоушенка', year=1994, category=film)
+    shawshank.genre.set((drama,))
+    return godfather, novel, shawshank
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Facets:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def facets(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`facets` возвращает ответ со статусом 200.'
+        )
+        return response.json()['facets']
+
+    def test_01_counts(self, client, titles):
+        assert self.facets(client, facets='category,genre,year') == {
+            'category': [
+                {'value': 'film', 'count': 2}, {'value': 'book', 'count': 1}
+            ],
+            'genre': [
+                {'value': 'crime', 'count': 2}, {'value': 'drama', 'count': 2}
+            ],
+            'year': [
+                {'value': 1960, 'count': 1},
+                {'value': 1970, 'count': 1},
+                {'value': 1990, 'count': 1},
+            ],
+        }, (
+            'Проверьте, что `facets` возвращает количество произведений '
+            'по категориям, жанрам и десятилетиям.'
+        )
+
+    def test_02_counts_follow_filter(self, client, titles):
+        assert self.facets(client, facets='genre', category='film') == {
+            'genre': [
+                {'value': 'drama', 'count': 2}, {'value': 'crime', 'count': 1}
+            ],
+        }, (
+            'Проверьте, что счётчики `facets` учитывают текущие фильтры.'
+        )
+
+    def test_03_counts_are_cached(self, client, titles,
+                                  django_assert_num_queries):
+        with django_assert_num_queries(5):
+            self.facets(client, facets='category,genre,year')
+        with django_assert_num_queries(2):
+            self.facets(
+                client, facets='category,genre,year', pagination='cursor')
+        titles[2].genre.clear()
+        assert self.facets(client, facets='genre', page=1) == {
+            'genre': [
+                {'value': 'crime', 'count': 2}, {'value': 'drama', 'count': 1}
+            ],
+        }, (
+            'Проверьте, что кэш счётчиков сбрасывается при изменении '
+            'произведений.'
+        )
+
+    def test_04_unknown_facet(self, client, titles):
+        response = client.get(self.TITLES_URL, {'facets': 'author'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import HISTOGRAM_FIELDS, Review, Title
+
+
+def expected(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ScoreHistogram:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def get_histogram(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+            {'histogram': 'true'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('histogram')
+
+    def test_01_histogram_follows_reviews(self, client, user, admin,
+                                          moderator):
+        title = Title.objects.create(name='Крёстный отец', year=1972)
+        other = Title.objects.create(name='Шоу Трумана', year=1998)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=7)
+        Review.objects.create(title=title, author=admin, text='Отзыв', score=7)
+        Review.objects.create(
+            title=title, author=moderator, text='Отзыв', score=10)
+        assert self.get_histogram(client, title.pk) == expected(s7=2, s10=1), (
+            'Проверьте, что гистограмма оценок обновляется при создании '
+            'отзыва и выводится при `?histogram=true`.'
+        )
+
+        review.score = 3
+        review.save()
+        assert self.get_histogram(client, title.pk) == expected(
+            s3=1, s7=1, s10=1
+        ), (
+            'Проверьте, что гистограмма оценок обновляется при изменении '
+            'оценки.'
+        )
+
+        review.title = other
+        review.save()
+        Review.objects.get(author=admin).delete()
+        assert self.get_histogram(client, title.pk) == expected(s10=1), (
+            'Проверьте, что гистограмма оценок обновляется при удалении '
+            'отзыва и переносе его на другое произведение.'
+        )
+        assert self.get_histogram(client, other.pk) == expected(s3=1)
+
+    def test_02_histogram_is_optional(self, client):
+        title = Title.objects.create(name='Крёстный отец', year=1972)
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.pk))
+        assert 'histogram' not in response.json(), (
+            'Проверьте, что гистограмма выводится только по запросу.'
+        )
+
+    def test_03_recalculate_command(self, client, user, admin):
+        title = Title.objects.create(name='Крёстный отец', year=1972)
+        empty = Title.objects.create(name='Шоу Трумана', year=1998)
+        Review.objects.create(title=title, author=user, text='Отзыв', score=8)
+        Review.objects.create(title=title, author=admin, text='Отзыв', score=5)
+        Title.objects.update(
+            score_sum=0, score_count=0, rating=None,
+            **dict.fromkeys(HISTOGRAM_FIELDS, 3)
+        )
+        call_command('recalculate_scores', batch_size=1)
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count, title.rating) == (
+            13, 2, 6
+        )
+        assert self.get_histogram(client, title.pk) == expected(s5=1, s8=1), (
+            'Проверьте, что команда `recalculate_scores` восстанавливает '
+            'гистограмму оценок.'
+        )
+        assert self.get_histogram(client, empty.pk) == expected()
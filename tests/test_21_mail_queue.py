@@ -0,0 +1,116 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+
+from api.mail_queue import mail_queue
+
+
+class FlakyEmailBackend(EmailBackend):
+    connections = 0
+    failures = 0
+
+    def open(self):
+        FlakyEmailBackend.connections += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures:
+            FlakyEmailBackend.failures -= 1
+            raise ConnectionError('SMTP-сервер недоступен.')
+        return super().send_messages(messages)
+
+
+class SlowEmailBackend(EmailBackend):
+    released = threading.Event()
+
+    def send_messages(self, messages):
+        SlowEmailBackend.released.wait(5)
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def async_mail(settings):
+    settings.EMAIL_QUEUE_ASYNC = True
+    settings.EMAIL_QUEUE_RETRY_DELAY = 0
+    FlakyEmailBackend.connections = FlakyEmailBackend.failures = 0
+    yield settings
+    mail_queue.join()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21MailQueue:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def signup(self, client, username):
+        response = client.post(self.URL_SIGNUP, data={
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+        return response
+
+    def test_01_signup_does_not_wait_for_smtp(self, client, async_mail):
+        async_mail.EMAIL_BACKEND = (
+            'tests.test_21_mail_queue.SlowEmailBackend')
+        SlowEmailBackend.released.clear()
+        self.signup(client, 'slow_user')
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что `signup` не ждёт отправки письма.'
+        )
+        SlowEmailBackend.released.set()
+        mail_queue.join()
+        assert [message.to for message in mail.outbox] == [
+            ['slow_user@yamdb.fake']
+        ], (
+            'Проверьте, что письмо с кодом подтверждения отправляется '
+            'фоновой очередью.'
+        )
+
+    def test_02_batches_and_retries(self, async_mail):
+        async_mail.EMAIL_BACKEND = (
+            'tests.test_21_mail_queue.FlakyEmailBackend')
+        FlakyEmailBackend.failures = 1
+        messages = [
+            EmailMessage('Код', 'Код', to=[f'user_{number}@yamdb.fake'])
+            for number in range(3)
+        ]
+        mail_queue.ensure_started()
+        mail_queue.deliver([(message, 0, 0) for message in messages])
+        assert (FlakyEmailBackend.connections, len(mail.outbox)) == (1, 2), (
+            'Проверьте, что пачка писем отправляется через одно соединение.'
+        )
+        mail_queue.join()
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            f'user_{number}@yamdb.fake' for number in range(3)
+        ], (
+            'Проверьте, что неотправленные письма отправляются повторно.'
+        )
+
+    def test_03_retries_do_not_delay_new_mail(self, async_mail):
+        async_mail.EMAIL_BACKEND = (
+            'tests.test_21_mail_queue.FlakyEmailBackend')
+        async_mail.EMAIL_QUEUE_RETRY_DELAY = 60
+        FlakyEmailBackend.failures = 1
+        mail_queue.ensure_started()
+        mail_queue.deliver([
+            (EmailMessage('Код', 'Код', to=['late@yamdb.fake']), 0, 0)
+        ])
+        mail_queue.send(EmailMessage('Код', 'Код', to=['new@yamdb.fake']))
+        mail_queue.queue.join()
+        assert [message.to for message in mail.outbox] == [
+            ['new@yamdb.fake']
+        ], (
+            'Проверьте, что отложенный повтор не задерживает отправку '
+            'новых писем.'
+        )
+        with mail_queue.retry_condition:
+            mail_queue.retries = [
+                (0, *retry[1:]) for retry in mail_queue.retries
+            ]
+        mail_queue.queue.put(None)
+        mail_queue.join()
+        assert len(mail.outbox) == 2
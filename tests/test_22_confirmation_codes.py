@@ -0,0 +1,73 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.core import mail
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ConfirmationCodes:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+    USER_DATA = {'username': 'valid_username', 'email': 'valid@yamdb.fake'}
+
+    def signup(self, client):
+        response = client.post(self.URL_SIGNUP, data=self.USER_DATA)
+        assert response.status_code == HTTPStatus.OK
+        return re.search(r'\d+', mail.outbox[-1].body).group()
+
+    def obtain_token(self, client, confirmation_code):
+        return client.post(self.URL_TOKEN, data={
+            'username': self.USER_DATA['username'],
+            'confirmation_code': confirmation_code,
+        })
+
+    def test_01_token_obtain_reads_user_once(self, client,
+                                             django_assert_num_queries):
+        confirmation_code = self.signup(client)
+        with django_assert_num_queries(1):
+            response = self.obtain_token(client, confirmation_code)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что код подтверждения из письма позволяет получить '
+            'токен.'
+        )
+        assert 'token' in response.json()
+
+    def test_02_code_is_single_use(self, client):
+        confirmation_code = self.signup(client)
+        wrong_code = str((int(confirmation_code) + 1) % 10 ** 6).zfill(6)
+        assert self.obtain_token(
+            client, wrong_code).status_code == HTTPStatus.BAD_REQUEST
+        assert self.obtain_token(
+            client, confirmation_code
+        ).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что код подтверждения сгорает после любой попытки '
+            'получить токен.'
+        )
+        confirmation_code = self.signup(client)
+        assert self.obtain_token(
+            client, confirmation_code).status_code == HTTPStatus.OK
+        assert self.obtain_token(
+            client, confirmation_code).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_code_expires(self, client, settings):
+        settings.CONFIRMATION_CODE_TTL = 0
+        confirmation_code = self.signup(client)
+        assert self.obtain_token(
+            client, confirmation_code
+        ).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что код подтверждения перестаёт действовать по '
+            'истечении `CONFIRMATION_CODE_TTL`.'
+        )
+
+    def test_04_code_cache_is_shared(self):
+        alias = settings.CONFIRMATION_CODE_CACHE_ALIAS
+        assert not isinstance(caches[alias], (LocMemCache, DummyCache)), (
+            'Проверьте, что коды подтверждения хранятся в кэше, общем для '
+            'всех процессов сервера и переживающем перезапуск.'
+        )
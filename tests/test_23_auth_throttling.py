@@ -0,0 +1,122 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import AuthIPThrottle
+
+
+@pytest.fixture
+def rates(settings):
+    settings.AUTH_THROTTLE_RATES = {'ip': (3, 60), 'username': (2, 60)}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23AuthThrottling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def obtain_token(self, client, username, ip='10.0.0.1'):
+        return client.post(
+            self.URL_TOKEN,
+            data={'username': username, 'confirmation_code': '000000'},
+            REMOTE_ADDR=ip,
+        )
+
+    def test_01_limit_by_ip(self, client, rates, django_assert_num_queries):
+        for number in range(3):
+            response = self.obtain_token(client, f'user_{number}')
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        with django_assert_num_queries(0):
+            response = self.obtain_token(client, 'user_3')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что запросы к `{self.URL_TOKEN}` сверх лимита для '
+            'одного IP отклоняются со статусом 429 без обращения к БД.'
+        )
+        assert 0 < int(response['Retry-After']) <= 20, (
+            'Проверьте, что ответ 429 содержит заголовок `Retry-After`.'
+        )
+        assert self.obtain_token(
+            client, 'user_3', ip='10.0.0.2'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_limit_by_username(self, client, rates):
+        for number in range(2):
+            response = self.obtain_token(
+                client, 'victim', ip=f'10.0.1.{number}')
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        response = self.obtain_token(client, 'victim', ip='10.0.1.9')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что запросы для одного `username` ограничиваются '
+            'независимо от IP.'
+        )
+        response = client.post(self.URL_SIGNUP, data={
+            'username': 'victim', 'email': 'victim@yamdb.fake'
+        }, REMOTE_ADDR='10.0.1.10')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что лимит действует и на `{self.URL_SIGNUP}`.'
+        )
+
+    def test_03_non_mapping_body(self, client):
+        response = client.post(
+            self.URL_SIGNUP, data='[1, 2]', content_type='application/json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что тело запроса не в виде объекта отклоняется '
+            'сериализатором со статусом 400.'
+        )
+
+    def test_04_username_is_hashed(self, client, rates):
+        self.obtain_token(client, ' strange key\n')
+        self.obtain_token(client, ' strange key\n', ip='10.0.0.2')
+        response = self.obtain_token(client, ' strange key\n', ip='10.0.0.3')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+    def test_05_spoofed_forwarded_for(self, client, rates):
+        for number in range(3):
+            response = client.post(
+                self.URL_TOKEN,
+                data={'username': f'user_{number}', 'confirmation_code': '0'},
+                REMOTE_ADDR='10.0.0.1',
+                HTTP_X_FORWARDED_FOR=f'192.168.0.{number}',
+            )
+        response = client.post(
+            self.URL_TOKEN,
+            data={'username': 'user_3', 'confirmation_code': '0'},
+            REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='192.168.0.3',
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что лимит по IP нельзя обойти, подменив заголовок '
+            '`X-Forwarded-For`.'
+        )
+
+    def test_06_concurrent_requests(self, rates, monkeypatch):
+        get = LocMemCache.get
+
+        def slow_get(cache, *args, **kwargs):
+            value = get(cache, *args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        monkeypatch.setattr(LocMemCache, 'get', slow_get)
+        request = APIRequestFactory().post(
+            self.URL_TOKEN, REMOTE_ADDR='10.0.2.1')
+        barrier = threading.Barrier(8)
+        allowed = []
+
+        def hit():
+            barrier.wait()
+            allowed.append(AuthIPThrottle().allow_request(request, None))
+
+        threads = [threading.Thread(target=hit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert allowed.count(True) == 3, (
+            'Проверьте, что параллельные запросы не расходуют один и тот же '
+            'токен.'
+        )
@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import RoleAccessToken
+from reviews.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24StatelessJWT:
+
+    GENRES_URL = '/api/v1/genres/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_token_has_claims(self, user):
+        token = RoleAccessToken.for_user(user)
+        claims = AccessToken(str(token))
+        assert (
+            claims['user_id'], claims['role'], claims['is_staff']
+        ) == (user.id, 'user', False), (
+            'Проверьте, что токен содержит id, роль и признак is_staff.'
+        )
+
+    def test_02_permissions_without_queries(self, user, admin, role_client,
+                                            django_assert_num_queries):
+        with django_assert_num_queries(0):
+            response = role_client(user).post(
+                self.GENRES_URL, data={'name': 'Драма', 'slug': 'drama'})
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что права проверяются по данным токена без '
+            'обращения к БД.'
+        )
+        with django_assert_num_queries(2):
+            response = role_client(admin).get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_token_user_can_write(self, user, role_client):
+        title = Title.objects.create(name='Крёстный отец', year=1972)
+        response = role_client(user).post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 9}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        response = role_client(user).get(f'{self.USERS_URL}me/')
+        assert response.json()['email'] == user.email
+
+    def test_04_role_change_invalidates_token(self, user, admin,
+                                              role_client):
+        stale_client = role_client(user)
+        response = role_client(admin).patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'})
+        assert response.status_code == HTTPStatus.OK
+        response = stale_client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли старый токен отклоняется.'
+        )
+        user.refresh_from_db()
+        assert role_client(user).get(
+            self.USERS_URL).status_code == HTTPStatus.OK
+
+    def test_05_deleted_user_token_rejected(self, user, role_client):
+        stale_client = role_client(user)
+        user.delete()
+        assert stale_client.get(
+            self.GENRES_URL).status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_06_rename_returns_fresh_token(self, user, role_client):
+        client = role_client(user)
+        response = client.patch(
+            f'{self.USERS_URL}me/', data={'username': 'Renamed'})
+        assert response.status_code == HTTPStatus.OK
+        assert 'token' in response.json(), (
+            'Проверьте, что при смене username профиль возвращается вместе '
+            'с новым токеном.'
+        )
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+        response = client.get(f'{self.USERS_URL}me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == 'Renamed'
+        response = client.patch(f'{self.USERS_URL}me/', data={'bio': 'Bio'})
+        assert 'token' not in response.json()
+
+    def test_07_token_versions_are_shared(self, settings):
+        alias = settings.TOKEN_VERSION_CACHE_ALIAS
+        assert not isinstance(caches[alias], (LocMemCache, DummyCache)), (
+            'Проверьте, что версии токенов хранятся в кэше, общем для всех '
+            'процессов сервера.'
+        )
@@ -0,0 +1,52 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.authentication import verified_tokens
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25VerifiedTokenCache:
+
+    GENRES_URL = '/api/v1/genres/'
+    STATS_URL = '/api/v1/auth/token/cache/'
+
+    def test_01_repeated_token_is_cached(self, role_admin_client,
+                                         monkeypatch):
+        role_admin_client.get(self.GENRES_URL)
+
+        def fail(*args, **kwargs):
+            raise AssertionError('Подпись токена проверяется повторно.')
+
+        monkeypatch.setattr(
+            'api.authentication.StatelessJWTAuthentication'
+            '.get_validated_token', fail
+        )
+        response = role_admin_client.get(self.STATS_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'hits': 1, 'misses': 1, 'size': 1, 'max_size': 10000
+        }, (
+            f'Проверьте, что `{self.STATS_URL}` возвращает счётчики '
+            'попаданий и промахов кэша проверенных токенов.'
+        )
+
+    def test_02_cache_is_bounded(self, user, admin, moderator, settings,
+                                 role_client):
+        settings.VERIFIED_TOKEN_CACHE_SIZE = 2
+        for author in (user, admin, moderator):
+            role_client(author).get(self.GENRES_URL)
+        assert verified_tokens.stats()['size'] == 2
+
+    def test_03_role_change_evicts(self, user, role_user_client,
+                                   role_admin_client):
+        client = role_user_client
+        assert client.get(self.GENRES_URL).status_code == HTTPStatus.OK
+        role_admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'})
+        assert client.get(
+            self.GENRES_URL
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что закэшированный токен отклоняется после смены '
+            'роли пользователя.'
+        )
@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from api.authentication import RoleAccessToken
+from api.revocation import revoked_tokens
+from reviews.models import RevokedToken
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TokenRevocation:
+
+    GENRES_URL = '/api/v1/genres/'
+    REVOKE_URL = '/api/v1/auth/token/revoke/'
+
+    def test_01_revoke_by_jti(self, user, admin, role_client,
+                              django_assert_num_queries):
+        token = RoleAccessToken.for_user(user)
+        client = role_client(token=token)
+        other_client = role_client(user)
+        with django_assert_num_queries(1):
+            assert client.get(self.GENRES_URL).status_code == HTTPStatus.OK
+        response = role_client(admin).post(
+            self.REVOKE_URL, data={'jti': token['jti']})
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(
+            self.GENRES_URL
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что отозванный по jti токен отклоняется, даже если '
+            'он уже был проверен ранее.'
+        )
+        assert other_client.get(
+            self.GENRES_URL).status_code == HTTPStatus.OK
+        revoked_tokens.clear()
+        revoked_tokens.refresh()
+        assert revoked_tokens.is_revoked(token['jti']), (
+            'Проверьте, что отозванные токены сохраняются в БД.'
+        )
+
+    def test_02_revoke_by_user(self, user, admin, role_client):
+        client = role_client(user)
+        response = role_client(admin).post(
+            self.REVOKE_URL, data={'username': user.username})
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(
+            self.GENRES_URL).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что можно отозвать все токены пользователя.'
+        )
+
+    def test_03_revoke_requires_admin(self, user, role_client):
+        client = role_client(user)
+        assert client.post(
+            self.REVOKE_URL, data={'username': user.username}
+        ).status_code == HTTPStatus.FORBIDDEN
+        assert client.post(
+            self.REVOKE_URL, data={}).status_code == HTTPStatus.FORBIDDEN
+
+    def test_04_command(self, user):
+        token = RoleAccessToken.for_user(user)
+        call_command('revoke_tokens', jti=[token['jti']], user=[user.username])
+        assert RevokedToken.objects.filter(jti=token['jti']).exists()
+        user.refresh_from_db()
+        assert user.token_version == 1
+        RevokedToken.objects.update(expires_at='2000-01-01T00:00:00Z')
+        call_command('revoke_tokens', purge=True)
+        assert not RevokedToken.objects.exists()
+
+    def test_05_bloom_filter(self):
+        revoked_tokens.build(f'jti-{number}' for number in range(100))
+        assert all(
+            revoked_tokens.is_revoked(f'jti-{number}') for number in range(100)
+        )
+        assert not any(
+            revoked_tokens.is_revoked(f'other-{number}')
+            for number in range(1000)
+        )
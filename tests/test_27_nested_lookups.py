@@ -0,0 +1,62 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.autocomplete import title_index
+from reviews.models import Review, Title
+
+
+@pytest.fixture
+def titles():
+    titles = (
+        Title.objects.create(name='Крёстный отец', year=1972),
+        Title.objects.create(name='Шоу Трумана', year=1998),
+    )
+    # Бюджет запросов должен выполняться и при построенном индексе
+    # автодополнения.
+    title_index.build()
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27NestedLookups:
+
+    REVIEWS_URL = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL = '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+
+    def test_01_parent_resolved_once(self, role_user_client, titles,
+                                     django_assert_num_queries):
+        with django_assert_num_queries(4):
+            response = role_user_client.post(
+                self.REVIEWS_URL.format(title_id=titles[0].id),
+                data={'text': 'Отзыв', 'score': 9}
+            )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что при создании отзыва произведение запрашивается '
+            'из БД один раз.'
+        )
+        with django_assert_num_queries(2):
+            response = role_user_client.post(self.COMMENTS_URL.format(
+                title_id=titles[0].id, review_id=response.json()['id']
+            ), data={'text': 'Комментарий'})
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что при создании комментария отзыв запрашивается '
+            'из БД один раз.'
+        )
+
+    def test_02_review_must_belong_to_title(self, client, role_user_client,
+                                            titles, user):
+        review = Review.objects.create(
+            title=titles[0], author=user, text='Отзыв', score=9)
+        url = self.COMMENTS_URL.format(
+            title_id=titles[1].id, review_id=review.id)
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии недоступны по адресу с чужим '
+            'произведением.'
+        )
+        assert role_user_client.post(
+            url, data={'text': 'Комментарий'}
+        ).status_code == HTTPStatus.NOT_FOUND
+        assert client.get(self.COMMENTS_URL.format(
+            title_id=titles[0].id, review_id=review.id
+        )).status_code == HTTPStatus.OK
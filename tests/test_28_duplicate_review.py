@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.autocomplete import title_index
+from reviews.models import Review, Title
+
+
+@pytest.fixture
+def title():
+    title = Title.objects.create(name='Крёстный отец', year=1972)
+    # Бюджет запросов должен выполняться и при построенном индексе
+    # автодополнения.
+    title_index.build()
+    return title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28DuplicateReview:
+
+    REVIEWS_URL = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_create_without_exists_check(self, role_user_client, title,
+                                            django_assert_num_queries):
+        with django_assert_num_queries(4) as context:
+            response = role_user_client.post(
+                self.REVIEWS_URL.format(title_id=title.id),
+                data={'text': 'Отзыв', 'score': 9}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not any(
+            query['sql'].startswith('SELECT (1)')
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что перед созданием отзыва не выполняется проверка '
+            'существования повторного отзыва.'
+        )
+
+    def test_02_duplicate_review_rejected(self, role_user_client, title,
+                                          user):
+        Review.objects.create(
+            title=title, author=user, text='Отзыв', score=9)
+        response = role_user_client.post(
+            self.REVIEWS_URL.format(title_id=title.id),
+            data={'text': 'Ещё отзыв', 'score': 3}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв отклоняется со статусом 400.'
+        )
+        assert response.json() == {'non_field_errors': [
+            'Вы уже оставляли отзыв к этому произведению.'
+        ]}
+        title.refresh_from_db()
+        assert (title.score_count, title.score_9, title.score_3) == (1, 1, 0), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг произведения.'
+        )